@@ -4,7 +4,13 @@ import json
 import google.generativeai as genai
 import os
 import re
+import math
 import requests
+import secrets
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict, deque
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -14,19 +20,244 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)  # Allow React to connect
 
+PRICE_NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+BHK_PATTERN = re.compile(r'(\d+)\s*bhk')
+SIZE_PATTERN = re.compile(r'(\d+)\s*bhk\s*[-:]\s*(\d+(?:\.\d+)?)\s*sq', re.IGNORECASE)
+
+# Per-client chat sessions: history caps, idle expiry and an upper bound on live sessions
+CHAT_MEMORY_LIMIT = int(os.getenv('CHAT_MEMORY_LIMIT', 20))
+SEARCH_HISTORY_LIMIT = int(os.getenv('SEARCH_HISTORY_LIMIT', 20))
+VIEWED_PROPERTIES_LIMIT = int(os.getenv('VIEWED_PROPERTIES_LIMIT', 50))
+SESSION_IDLE_TTL_SECONDS = int(os.getenv('SESSION_IDLE_TTL_SECONDS', 1800))
+SESSION_MAX_COUNT = int(os.getenv('SESSION_MAX_COUNT', 1000))
+# Query words whose matching properties are remembered, shared by all sessions
+WORD_MATCHES_LIMIT = 4096
+
+# Google Places calls share one pooled session and a short-lived result cache
+PLACES_TIMEOUT = (3.05, 10)
+PLACES_CACHE_TTL_SECONDS = int(os.getenv('PLACES_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+PLACES_CACHE_MAX_ENTRIES = int(os.getenv('PLACES_CACHE_MAX_ENTRIES', 1024))
+places_session = requests.Session()
+places_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+places_cache = OrderedDict()  # key -> (result, fetched_at), oldest fetch first
+places_cache_lock = threading.Lock()
+
+def cache_places(cache_key, result):
+    """Store a nearby-places result, dropping expired entries and the oldest ones past the cap"""
+    now = time.time()
+    with places_cache_lock:
+        places_cache.pop(cache_key, None)
+        places_cache[cache_key] = (result, now)
+        while places_cache:
+            _, (_, fetched_at) = next(iter(places_cache.items()))
+            if now - fetched_at < PLACES_CACHE_TTL_SECONDS and len(places_cache) <= PLACES_CACHE_MAX_ENTRIES:
+                break
+            places_cache.popitem(last=False)
+
+def normalize_properties(properties):
+    """Parse price ranges, apartment types, sizes and search fields once into typed columns"""
+    columns = {
+        "price_min": array('d'),
+        "price_max": array('d'),
+        "bhk_types": [],
+        "sizes_sqft": [],
+        "locations": [],
+        "amenities": [],
+        "searchable": [],
+        # Query word -> indices of the properties whose searchable text contains it
+        "word_matches": {}
+    }
+    for prop in properties:
+        prices = [float(p) for p in PRICE_NUMBER_PATTERN.findall(str(prop.get("Price Range (Lakhs)") or ""))]
+        columns["price_min"].append(min(prices) if prices else math.nan)
+        columns["price_max"].append(max(prices) if prices else math.nan)
+        columns["bhk_types"].append(frozenset(
+            int(n) for n in BHK_PATTERN.findall(str(prop.get("Apartment Types") or "").lower())
+        ))
+        columns["sizes_sqft"].append({
+            int(bhk): float(sqft) for bhk, sqft in SIZE_PATTERN.findall(str(prop.get("Apartment Sizes") or ""))
+        })
+        columns["locations"].append(prop.get("Location", "").lower())
+        prop_amenities = prop.get("Amenities", "").lower()
+        columns["amenities"].append(frozenset(amenity for amenity in SEARCH_AMENITIES if amenity in prop_amenities))
+        columns["searchable"].append(
+            f"{prop.get('Building Name', '')} {prop.get('Location', '')} {prop.get('Apartment Types', '')} {prop.get('Amenities', '')}".lower()
+        )
+    # The shared query keywords plus this catalog's locations, so one scan also finds the locations
+    columns["query_matcher"] = build_query_matcher(set(columns["locations"]))
+    return columns
+
+def build_map_markers(properties):
+    """Map marker for each property with coordinates (None otherwise), numbered in catalog order"""
+    markers = []
+    marker_id = 0
+    for prop in properties:
+        marker = None
+        if prop.get('Latitude') and prop.get('Longitude'):
+            marker_id += 1
+            marker = {
+                'id': marker_id,
+                'name': prop.get('Building Name'),
+                'location': prop.get('Location'),
+                'lat': prop.get('Latitude'),
+                'lng': prop.get('Longitude'),
+                'price': prop.get('Price Range (Lakhs)'),
+                'types': prop.get('Apartment Types'),
+                'amenities': prop.get('Amenities'),
+                'contact': prop.get('Builder Contact'),
+                'builder': prop.get('Builder Name'),
+                'status': prop.get('Availability Status')
+            }
+        markers.append(marker)
+    return markers
+
+# Interest categories, in the order they are reported
+INTEREST_KEYWORDS = {
+    'budget': ['budget', 'price', 'cost', 'lakh', 'affordable', 'expensive'],
+    'location': ['location', 'area', 'near', 'close to', 'kadri', 'bejai', 'mangalore'],
+    'amenities': ['gym', 'pool', 'swimming', 'parking', 'security', 'clubhouse', 'playground'],
+    'size': ['bhk', 'sqft', 'size', 'spacious', 'big', 'small'],
+    'connectivity': ['airport', 'railway', 'bus', 'transport', 'commute', 'travel'],
+    'investment': ['investment', 'resale', 'appreciation', 'returns', 'future'],
+    'family': ['family', 'children', 'kids', 'school', 'education', 'safe'],
+    'lifestyle': ['modern', 'luxury', 'premium', 'lifestyle', 'comfort']
+}
+
+# Conversation-stage signals, applied in this order
+STAGE_KEYWORDS = {
+    'details': ['show', 'tell me about', 'details', 'info'],
+    'compare': ['compare', 'vs', 'better', 'difference'],
+    'decision': ['contact', 'visit', 'schedule', 'buy', 'book']
+}
+
+# Amenities find_properties matches against each property
+SEARCH_AMENITIES = ['gym', 'pool', 'swimming', 'parking', 'security', 'clubhouse']
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton: every occurrence of every keyword in one left-to-right pass"""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+
+        for keyword, payload in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append((keyword, payload))
+
+        # Breadth-first fail links; a state also reports the outputs of its fail state
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def finditer(self, text):
+        """Yield (start, end, keyword, payload) for every match, ordered by end offset"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword, payload in outputs[state]:
+                yield end - len(keyword), end, keyword, payload
+
+QUERY_KEYWORDS = (
+    [(keyword, ('interest', category)) for category, keywords in INTEREST_KEYWORDS.items() for keyword in keywords]
+    + [(keyword, ('stage', signal)) for signal, keywords in STAGE_KEYWORDS.items() for keyword in keywords]
+    + [(amenity, ('amenity', amenity)) for amenity in SEARCH_AMENITIES]
+    # Units whose preceding number is the budget in lakhs or the BHK count
+    + [('lakh', ('unit', 'lakh')), ('bhk', ('unit', 'bhk'))]
+)
+QUERY_MATCHER = KeywordAutomaton(QUERY_KEYWORDS)
+
+def build_query_matcher(locations):
+    """QUERY_MATCHER's keywords plus the lowercased location names of one catalog"""
+    return KeywordAutomaton(QUERY_KEYWORDS + [(location, ('location', location)) for location in locations if location])
+
+def number_before(text, start):
+    """Integer written just before offset start, whitespace allowed in between, or None"""
+    end = start
+    while end and text[end - 1].isspace():
+        end -= 1
+    begin = end
+    while begin and text[begin - 1].isdecimal():
+        begin -= 1
+    return int(text[begin:end]) if begin < end else None
+
+def classify_query(query_lower, matcher=QUERY_MATCHER):
+    """Interest categories, stage signals, search amenities, locations, budget and BHK in a query, from one scan.
+
+    The budget and BHK are the first numbers written before 'lakh' and 'bhk',
+    as r'(\d+)\s*lakh' and r'(\d+)\s*bhk' would find them. Locations are
+    only found when the matcher was built with build_query_matcher.
+    Each match is also reported as {'start', 'end', 'keyword', 'kind', 'value'}
+    so callers can reuse the offsets instead of re-scanning the query.
+    """
+    matches = []
+    found = {'interest': set(), 'stage': set(), 'amenity': set(), 'location': set(), 'unit': set()}
+    numbers = {}
+    for start, end, keyword, (kind, value) in matcher.finditer(query_lower):
+        matches.append({'start': start, 'end': end, 'keyword': keyword, 'kind': kind, 'value': value})
+        found[kind].add(value)
+        if kind == 'unit' and value not in numbers:
+            number = number_before(query_lower, start)
+            if number is not None:
+                numbers[value] = number
+    return {
+        'interests': [category for category in INTEREST_KEYWORDS if category in found['interest']],
+        'stage_signals': found['stage'],
+        'amenities': [amenity for amenity in SEARCH_AMENITIES if amenity in found['amenity']],
+        'locations': found['location'],
+        'budget': numbers.get('lakh'),
+        'bhk': numbers.get('bhk'),
+        'matches': matches
+    }
+
+def new_user_behavior():
+    """Per-session behavior state; histories are ring buffers and scores are counters"""
+    return {
+        "interests": [],
+        "search_pattern": deque(maxlen=SEARCH_HISTORY_LIMIT),
+        "viewed_properties": deque(maxlen=VIEWED_PROPERTIES_LIMIT),
+        "preference_score": Counter(),
+        "conversation_stage": "discovery",  # discovery, evaluation, decision
+        "query_count": 0
+    }
+
 class IntelligentPropertyChatbot:
-    def __init__(self):
-        print("🤖 Initializing Intelligent Property Chatbot...")
-        self.properties_data = self.load_properties()
-        self.chat_memory = []
-        self.user_behavior = {
-            "interests": [],
-            "search_pattern": [],
-            "viewed_properties": [],
-            "preference_score": {},
-            "conversation_stage": "discovery"  # discovery, evaluation, decision
-        }
-        self.setup_gemini()
+    def __init__(self, shared=None):
+        """Load the catalog and Gemini model, or share them with an existing chatbot for a new session"""
+        if shared is None:
+            print("🤖 Initializing Intelligent Property Chatbot...")
+            self.properties_data = self.load_properties()
+            self.property_columns = normalize_properties(self.properties_data)
+            self.map_markers = build_map_markers(self.properties_data)
+            self.setup_gemini()
+        else:
+            self.properties_data = shared.properties_data
+            self.property_columns = shared.property_columns
+            self.map_markers = shared.map_markers
+            if hasattr(shared, 'model'):
+                self.model = shared.model
+        self.lock = threading.Lock()
+        self.message_count = 0
+        self.chat_memory = deque(maxlen=CHAT_MEMORY_LIMIT)
+        self.user_behavior = new_user_behavior()
     
     def load_properties(self):
         """Load properties from JSON file"""
@@ -50,53 +281,46 @@ class IntelligentPropertyChatbot:
             print("❌ Please add GEMINI_API_KEY to your .env file")
     
     def analyze_user_behavior(self, query):
-        """Analyze user behavior patterns for intelligent suggestions"""
+        """Analyze user behavior patterns for intelligent suggestions; returns the query classification"""
         query_lower = query.lower()
+        analysis = classify_query(query_lower, self.property_columns["query_matcher"])
         
         # Track interests
-        interest_keywords = {
-            'budget': ['budget', 'price', 'cost', 'lakh', 'affordable', 'expensive'],
-            'location': ['location', 'area', 'near', 'close to', 'kadri', 'bejai', 'mangalore'],
-            'amenities': ['gym', 'pool', 'swimming', 'parking', 'security', 'clubhouse', 'playground'],
-            'size': ['bhk', 'sqft', 'size', 'spacious', 'big', 'small'],
-            'connectivity': ['airport', 'railway', 'bus', 'transport', 'commute', 'travel'],
-            'investment': ['investment', 'resale', 'appreciation', 'returns', 'future'],
-            'family': ['family', 'children', 'kids', 'school', 'education', 'safe'],
-            'lifestyle': ['modern', 'luxury', 'premium', 'lifestyle', 'comfort']
-        }
-        
-        for category, keywords in interest_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                if category not in self.user_behavior['interests']:
-                    self.user_behavior['interests'].append(category)
-                
-                # Increase preference score
-                self.user_behavior['preference_score'][category] = \
-                    self.user_behavior['preference_score'].get(category, 0) + 1
+        for category in analysis['interests']:
+            if category not in self.user_behavior['interests']:
+                self.user_behavior['interests'].append(category)
+            
+            # Increase preference score
+            self.user_behavior['preference_score'][category] = \
+                self.user_behavior['preference_score'].get(category, 0) + 1
         
-        # Track search pattern
+        # Track search pattern; only the most recent SEARCH_HISTORY_LIMIT entries are kept
+        self.user_behavior['query_count'] += 1
         self.user_behavior['search_pattern'].append({
             'query': query,
             'timestamp': datetime.now().isoformat(),
-            'interests_detected': [cat for cat, keywords in interest_keywords.items() 
-                                 if any(keyword in query_lower for keyword in keywords)]
+            'interests_detected': analysis['interests']
         })
         
         # Determine conversation stage
-        self.update_conversation_stage(query_lower)
+        self.update_conversation_stage(query_lower, analysis['stage_signals'])
+        return analysis
     
-    def update_conversation_stage(self, query_lower):
+    def update_conversation_stage(self, query_lower, stage_signals=None):
         """Update conversation stage based on user queries"""
-        if any(word in query_lower for word in ['show', 'tell me about', 'details', 'info']):
+        if stage_signals is None:
+            stage_signals = classify_query(query_lower)['stage_signals']
+        
+        if 'details' in stage_signals:
             if len(self.user_behavior['viewed_properties']) > 2:
                 self.user_behavior['conversation_stage'] = 'evaluation'
             else:
                 self.user_behavior['conversation_stage'] = 'discovery'
         
-        if any(word in query_lower for word in ['compare', 'vs', 'better', 'difference']):
+        if 'compare' in stage_signals:
             self.user_behavior['conversation_stage'] = 'evaluation'
         
-        if any(word in query_lower for word in ['contact', 'visit', 'schedule', 'buy', 'book']):
+        if 'decision' in stage_signals:
             self.user_behavior['conversation_stage'] = 'decision'
     
     def generate_proactive_suggestions(self):
@@ -148,44 +372,45 @@ class IntelligentPropertyChatbot:
         query_lower = query.lower()
         matched_properties = []
         
-        # Analyze user behavior
-        self.analyze_user_behavior(query)
-        
-        for prop in self.properties_data:
+        # Analyze user behavior; the same scan yields the amenities, locations, budget and BHK to score on
+        analysis = self.analyze_user_behavior(query)
+        query_amenities = frozenset(analysis['amenities'])
+        query_locations = analysis['locations']
+        budget = analysis['budget']
+        bhk = analysis['bhk']
+        columns = self.property_columns
+        price_max = columns["price_max"]
+        bhk_types = columns["bhk_types"]
+        locations = columns["locations"]
+        amenities = columns["amenities"]
+        
+        # General keyword matching, answered per word from the shared word_matches memo
+        word_hits = Counter()
+        for word in [word for word in query_lower.split() if len(word) > 2]:
+            word_hits.update(self.properties_matching(word))
+        
+        for i, prop in enumerate(self.properties_data):
             score = 0
             
             # Enhanced scoring based on user behavior
             for interest in self.user_behavior['interests']:
                 if interest == 'budget':
-                    budget_match = re.search(r'(\d+)\s*lakh', query_lower)
-                    if budget_match:
-                        budget = int(budget_match.group(1))
-                        price_range = prop.get("Price Range (Lakhs)", "")
-                        prices = re.findall(r'\d+', price_range)
-                        if prices and int(prices[-1]) <= budget:
-                            score += 15  # Higher weight for budget match
+                    if budget is not None and price_max[i] <= budget:
+                        score += 15  # Higher weight for budget match
                 
                 elif interest == 'location':
-                    if prop.get("Location", "").lower() in query_lower:
+                    # An empty location is contained in every query
+                    if not locations[i] or locations[i] in query_locations:
                         score += 12
                 
                 elif interest == 'amenities':
-                    amenities = ['gym', 'pool', 'swimming', 'parking', 'security', 'clubhouse']
-                    for amenity in amenities:
-                        if amenity in query_lower and amenity in prop.get("Amenities", "").lower():
-                            score += 8
+                    score += 8 * len(amenities[i] & query_amenities)
             
             # BHK matching
-            bhk_match = re.search(r'(\d+)\s*bhk', query_lower)
-            if bhk_match and bhk_match.group(1) in prop.get("Apartment Types", "").lower():
+            if bhk is not None and bhk in bhk_types[i]:
                 score += 10
             
-            # General keyword matching
-            searchable_text = f"{prop.get('Building Name', '')} {prop.get('Location', '')} {prop.get('Apartment Types', '')} {prop.get('Amenities', '')}".lower()
-            query_words = [word for word in query_lower.split() if len(word) > 2]
-            for word in query_words:
-                if word in searchable_text:
-                    score += 2
+            score += 2 * word_hits[i]
             
             if score > 0:
                 matched_properties.append((prop, score))
@@ -202,6 +427,17 @@ class IntelligentPropertyChatbot:
         
         return result_properties
     
+    def properties_matching(self, word):
+        """Indices of the properties whose searchable text contains word, memoized per catalog"""
+        word_matches = self.property_columns["word_matches"]
+        matched = word_matches.get(word)
+        if matched is None:
+            matched = tuple(i for i, text in enumerate(self.property_columns["searchable"]) if word in text)
+            if len(word_matches) >= WORD_MATCHES_LIMIT:
+                word_matches.clear()
+            word_matches[word] = matched
+        return matched
+    
     def find_nearby_places(self, lat, lng, place_type="school", radius=2000):
         """Find nearby places using Google Places API"""
         google_api_key = os.getenv('GOOGLE_MAPS_API_KEY')
@@ -237,8 +473,15 @@ class IntelligentPropertyChatbot:
             'key': google_api_key
         }
         
+        # ~1m rounding lets neighbouring lookups for the same building share a result
+        cache_key = (round(float(lat), 5), round(float(lng), 5), google_type, int(radius))
+        with places_cache_lock:
+            cached = places_cache.get(cache_key)
+        if cached and time.time() - cached[1] < PLACES_CACHE_TTL_SECONDS:
+            return cached[0]
+        
         try:
-            response = requests.get(url, params=params)
+            response = places_session.get(url, params=params, timeout=PLACES_TIMEOUT)
             data = response.json()
             
             if data.get('status') == 'OK':
@@ -255,7 +498,9 @@ class IntelligentPropertyChatbot:
                     }
                     places.append(place_info)
                 
-                return {"places": places, "count": len(places)}
+                result = {"places": places, "count": len(places)}
+                cache_places(cache_key, result)
+                return result
             else:
                 return {"error": f"Google Places API error: {data.get('status')}"}
         
@@ -321,30 +566,115 @@ Keep it friendly, concise, and focused on what they actually asked! 🤖✨
             print(f"❌ Error generating AI response: {e}")
             return f"I found some great properties for you! 😊 {properties_text if properties else 'Let me help you find the perfect property.'}"
     
+    def remember(self, user_query, bot_response, properties):
+        """Add an exchange to the capped chat memory, keeping only property names"""
+        self.message_count += 1
+        self.chat_memory.append({
+            "user": user_query,
+            "bot": bot_response,
+            "properties": [prop.get('Building Name') for prop in properties],
+            "timestamp": datetime.now().isoformat()
+        })
+    
     def clear_memory(self):
         """Clear all chat memory and user behavior data"""
-        self.chat_memory = []
-        self.user_behavior = {
-            "interests": [],
-            "search_pattern": [],
-            "viewed_properties": [],
-            "preference_score": {},
-            "conversation_stage": "discovery"
-        }
+        self.message_count = 0
+        self.chat_memory.clear()
+        self.user_behavior = new_user_behavior()
         print("🧹 Chat memory and user behavior data cleared")
     
     def get_chat_summary(self):
         """Get summary of current chat session"""
         return {
-            "total_messages": len(self.chat_memory),
+            "total_messages": self.message_count,
             "properties_viewed": len(self.user_behavior['viewed_properties']),
             "user_interests": self.user_behavior['interests'],
             "conversation_stage": self.user_behavior['conversation_stage'],
-            "preference_scores": self.user_behavior['preference_score']
+            "preference_scores": dict(self.user_behavior['preference_score'])
+        }
+    
+    def get_behavior_summary(self):
+        """Compact view of user behavior for chat responses, without the search history"""
+        behavior = self.user_behavior
+        return {
+            "interests": behavior['interests'],
+            "conversation_stage": behavior['conversation_stage'],
+            "preference_score": dict(behavior['preference_score']),
+            "query_count": behavior['query_count'],
+            "viewed_count": len(behavior['viewed_properties']),
+            "last_query": behavior['search_pattern'][-1]['query'] if behavior['search_pattern'] else None
         }
+    
+    def get_behavior_details(self):
+        """JSON-ready copy of the bounded behavior state"""
+        behavior = dict(self.user_behavior)
+        behavior['search_pattern'] = list(behavior['search_pattern'])
+        behavior['viewed_properties'] = list(behavior['viewed_properties'])
+        behavior['preference_score'] = dict(behavior['preference_score'])
+        return behavior
+
+class ChatSessions:
+    """Per-client chatbots keyed by session token.
 
-# Create chatbot instance
+    Sessions share the catalog and model of the template chatbot. They are
+    kept in least-recently-used order, so idle sessions are dropped from the
+    front and the oldest one is evicted once SESSION_MAX_COUNT is reached.
+    """
+    
+    def __init__(self, template, max_sessions=SESSION_MAX_COUNT, idle_ttl_seconds=SESSION_IDLE_TTL_SECONDS):
+        self.template = template
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._sessions = OrderedDict()  # token -> (chatbot, last_used)
+        self._lock = threading.Lock()
+    
+    def _expire(self, now):
+        while self._sessions:
+            token, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used < self.idle_ttl_seconds:
+                break
+            del self._sessions[token]
+    
+    def get(self, token):
+        """The session's chatbot, or None if the token is unknown or expired"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(token) if token else None
+            if entry is None:
+                return None
+            self._sessions[token] = (entry[0], now)
+            self._sessions.move_to_end(token)
+            return entry[0]
+    
+    def get_or_create(self, token):
+        """(token, chatbot) for an existing session, or for a new one when the token is unknown"""
+        session = self.get(token)
+        if session is not None:
+            return token, session
+        token = secrets.token_urlsafe(16)
+        session = IntelligentPropertyChatbot(shared=self.template)
+        with self._lock:
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            self._sessions[token] = (session, time.time())
+        return token, session
+    
+    def delete(self, token):
+        with self._lock:
+            return self._sessions.pop(token, None) is not None
+    
+    def __len__(self):
+        return len(self._sessions)
+
+def session_token():
+    """Session token from the X-Session-Token header, the JSON body or the query string"""
+    data = request.get_json(silent=True) or {}
+    return request.headers.get('X-Session-Token') or data.get('session_id') or request.args.get('session_id')
+
+# Shared catalog and model; each client talks to its own session built on top of it
 chatbot = IntelligentPropertyChatbot()
+sessions = ChatSessions(chatbot)
 
 @app.route('/')
 def home():
@@ -362,29 +692,68 @@ def home():
 
 @app.route('/api/properties', methods=['GET'])
 def get_all_properties():
-    """Get all properties with coordinates for map display"""
-    properties_with_coords = []
-    for prop in chatbot.properties_data:
-        if prop.get('Latitude') and prop.get('Longitude'):
-            properties_with_coords.append({
-                'id': len(properties_with_coords) + 1,
-                'name': prop.get('Building Name'),
-                'location': prop.get('Location'),
-                'lat': prop.get('Latitude'),
-                'lng': prop.get('Longitude'),
-                'price': prop.get('Price Range (Lakhs)'),
-                'types': prop.get('Apartment Types'),
-                'amenities': prop.get('Amenities'),
-                'contact': prop.get('Builder Contact'),
-                'builder': prop.get('Builder Name'),
-                'status': prop.get('Availability Status')
-            })
-    
-    return jsonify({
-        "properties": chatbot.properties_data,
-        "map_properties": properties_with_coords,
-        "count": len(chatbot.properties_data)
+    """Get all properties with coordinates for map display.
+
+    Optional query parameters: fields (comma-separated columns), view
+    (full, map or list), location, bhk, min_price/max_price in lakhs,
+    offset and limit.
+    """
+    args = request.args
+    if not args:
+        return jsonify({
+            "properties": chatbot.properties_data,
+            "map_properties": [marker for marker in chatbot.map_markers if marker],
+            "count": len(chatbot.properties_data)
+        })
+
+    view = args.get('view', 'full')
+    if view not in ('full', 'map', 'list'):
+        return jsonify({"error": "view must be full, map or list"}), 400
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()]
+    location = args.get('location', '').lower()
+    bhk = args.get('bhk', type=int)
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+    offset = max(args.get('offset', 0, type=int), 0)
+    limit = args.get('limit', type=int)
+
+    columns = chatbot.property_columns
+    rows = []
+    for i, prop in enumerate(chatbot.properties_data):
+        if location and location not in str(prop.get('Location') or '').lower():
+            continue
+        if bhk is not None and bhk not in columns["bhk_types"][i]:
+            continue
+        if min_price is not None or max_price is not None:
+            if math.isnan(columns["price_max"][i]):
+                continue
+            if max_price is not None and columns["price_min"][i] > max_price:
+                continue
+            if min_price is not None and columns["price_max"][i] < min_price:
+                continue
+        if view == 'map' and not chatbot.map_markers[i]:
+            continue
+        rows.append(i)
+
+    page = rows[offset:offset + limit] if limit else rows[offset:]
+    response = {}
+    if view != 'map':
+        if fields:
+            response["properties"] = [{f: chatbot.properties_data[i].get(f) for f in fields} for i in page]
+        else:
+            response["properties"] = [chatbot.properties_data[i] for i in page]
+    if view != 'list':
+        response["map_properties"] = [chatbot.map_markers[i] for i in page if chatbot.map_markers[i]]
+        response["count"] = len(response["map_properties"])
+
+    next_offset = offset + len(page)
+    response.update({
+        "total": len(rows),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": next_offset if next_offset < len(rows) else None
     })
+    return jsonify(response)
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -398,40 +767,42 @@ def chat():
         
         print(f"💬 User: {user_query}")
         
-        # Find relevant properties
-        relevant_properties = chatbot.find_properties(user_query)
-        
-        # Generate intelligent response
-        bot_response = chatbot.create_intelligent_response(user_query, relevant_properties)
-        
-        # Generate proactive suggestions
-        proactive_suggestions = chatbot.generate_proactive_suggestions()
-        
-        # Extract images if user asks for them
-        images = []
-        if any(word in user_query.lower() for word in ['image', 'photo', 'picture', 'show']):
-            for prop in relevant_properties:
-                if prop.get("Building Photo URL"):
-                    images.append(prop["Building Photo URL"])
-        
-        # Save to memory
-        chatbot.chat_memory.append({
-            "user": user_query,
-            "bot": bot_response,
-            "properties": relevant_properties,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        print(f"🤖 Bot: {bot_response[:100]}...")
+        token, session = sessions.get_or_create(session_token())
         
-        return jsonify({
-            "response": bot_response,
-            "properties": relevant_properties,
-            "images": images,
-            "proactive_suggestions": proactive_suggestions,
-            "user_behavior": chatbot.user_behavior,
-            "chat_summary": chatbot.get_chat_summary()
-        })
+        # One turn at a time per session; other clients are not blocked
+        with session.lock:
+            # Find relevant properties
+            relevant_properties = session.find_properties(user_query)
+            
+            # Generate intelligent response
+            bot_response = session.create_intelligent_response(user_query, relevant_properties)
+            
+            # Generate proactive suggestions
+            proactive_suggestions = session.generate_proactive_suggestions()
+            
+            # Extract images if user asks for them
+            images = []
+            if any(word in user_query.lower() for word in ['image', 'photo', 'picture', 'show']):
+                for prop in relevant_properties:
+                    if prop.get("Building Photo URL"):
+                        images.append(prop["Building Photo URL"])
+            
+            # Save to memory
+            session.remember(user_query, bot_response, relevant_properties)
+            
+            print(f"🤖 Bot: {bot_response[:100]}...")
+            
+            response = jsonify({
+                "response": bot_response,
+                "properties": relevant_properties,
+                "images": images,
+                "proactive_suggestions": proactive_suggestions,
+                "session_id": token,
+                "user_behavior": session.get_behavior_summary(),
+                "chat_summary": session.get_chat_summary()
+            })
+        response.headers['X-Session-Token'] = token
+        return response
         
     except Exception as e:
         print(f"❌ Error in chat: {e}")
@@ -482,7 +853,11 @@ def find_nearby():
 def clear_chat():
     """Clear chat memory and user behavior"""
     try:
-        chatbot.clear_memory()
+        session = sessions.get(session_token())
+        if session is None:
+            return jsonify({"error": "Session not found"}), 404
+        with session.lock:
+            session.clear_memory()
         return jsonify({
             "message": "🧹 Chat memory cleared successfully!",
             "status": "success"
@@ -493,11 +868,15 @@ def clear_chat():
 @app.route('/api/user-insights', methods=['GET'])
 def get_user_insights():
     """Get detailed user behavior insights"""
-    return jsonify({
-        "behavior": chatbot.user_behavior,
-        "chat_summary": chatbot.get_chat_summary(),
-        "memory_size": len(chatbot.chat_memory)
-    })
+    session = sessions.get(session_token())
+    if session is None:
+        return jsonify({"error": "Session not found"}), 404
+    with session.lock:
+        return jsonify({
+            "behavior": session.get_behavior_details(),
+            "chat_summary": session.get_chat_summary(),
+            "memory_size": len(session.chat_memory)
+        })
 
 if __name__ == '__main__':
     print("\n" + "="*60)
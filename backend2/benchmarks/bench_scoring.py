@@ -0,0 +1,146 @@
+"""Compare PropertyFilter scoring engines on synthetic catalogs.
+
+Run from the backend2 directory:
+
+    python -m benchmarks.bench_scoring
+    python benchmarks/bench_scoring.py
+    python -m benchmarks.bench_scoring --sizes 100 10000 --repeat 5
+
+For every catalog size it times the per-row reference loop
+(_calculate_property_score over every property), the inverted-index path
+and the NumPy backend, and checks that all three return the same ranking.
+"cold" is the first pass over the queries with every memoized lookup and
+mask dropped, as for words no earlier query used; "warm" is the best of
+--repeat passes once those caches are filled.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+# Run as a script, the backend2 directory is not on the path for the services imports
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.preference_extractor import PreferenceExtractor
+from services.property_filter import PropertyFilter
+
+APARTMENTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "apartments.json")
+
+QUERIES = [
+    "2bhk in Kadri under 100 lakhs",
+    "apartments with gym and swimming pool",
+    "3bhk near airport between 50 to 150 lakhs",
+    "2bhk under 20 mins to the railway station",
+    "tech park within 15 minutes",
+    "Properties with gym",
+    "Compare builders",
+]
+
+PRICE_BANDS = ["30 - 50", "50 - 75", "75 - 100", "100 - 150", "150 - 200"]
+BHK_TYPES = ["1BHK", "2BHK", "3BHK", "4BHK"]
+
+
+def synthetic_catalog(base: List[Dict], rows: int, seed: int = 7) -> List[Dict]:
+    """Scale the real catalog to `rows` listings with varied names, prices and BHK mixes"""
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(rows):
+        prop = dict(base[i % len(base)])
+        prop["Building Name"] = f"{prop['Building Name']} Tower {i}"
+        prop["Price Range (Lakhs)"] = rng.choice(PRICE_BANDS)
+        prop["Apartment Types"] = ", ".join(rng.sample(BHK_TYPES, rng.randint(1, 4)))
+        catalog.append(prop)
+    return catalog
+
+
+def rank_reference(property_filter: PropertyFilter, query: str, context: Dict, k: int) -> List[int]:
+    query_lower = query.lower()
+    scoring = {}
+    for i in range(len(property_filter.properties_data)):
+        score = property_filter._calculate_property_score(i, query_lower, context)
+        if score > 0:
+            scoring[i] = score
+    return sorted(scoring, key=lambda i: scoring[i], reverse=True)[:k]
+
+
+def rank_index(property_filter: PropertyFilter, query: str, context: Dict, k: int) -> List[int]:
+    return property_filter._top_k(property_filter._score_candidates(query.lower(), context), k)
+
+
+def rank_numpy(property_filter: PropertyFilter, query: str, context: Dict, k: int) -> List[int]:
+    return property_filter.scorer.top_k(query.lower(), context, k)
+
+
+def reset_caches(property_filter: PropertyFilter):
+    """Drop memoized index lookups and scorer masks so the next pass runs cold"""
+    property_filter.index.clear_caches()
+    if property_filter.scorer:
+        property_filter.scorer.clear_caches()
+
+
+def timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: List[int], repeat: int, k: int, reference_limit: int):
+    with open(APARTMENTS_FILE, "r", encoding="utf-8") as file:
+        base = json.load(file)
+    extractor = PreferenceExtractor(base)
+
+    print(f"{'rows':>9} {'engine':>10} {'build s':>9} {'cold ms/q':>10} {'warm ms/q':>10}")
+    for rows in sizes:
+        catalog = synthetic_catalog(base, rows)
+
+        start = time.perf_counter()
+        property_filter = PropertyFilter(catalog, top_k=k, scoring_backend="numpy")
+        build_seconds = time.perf_counter() - start
+
+        contexts = []
+        for query in QUERIES:
+            context = {"user_preferences": {}}
+            extractor.extract_user_preferences(query, context)
+            contexts.append((query, context))
+
+        engines = [("index", rank_index), ("numpy", rank_numpy)]
+        if rows <= reference_limit:
+            engines.insert(0, ("reference", rank_reference))
+
+        rankings = {}
+        for name, rank in engines:
+            reset_caches(property_filter)
+            start = time.perf_counter()
+            rankings[name] = [rank(property_filter, query, context, k) for query, context in contexts]
+            cold_ms = (time.perf_counter() - start) / len(contexts) * 1000
+            seconds = timed(lambda: [rank(property_filter, q, c, k) for q, c in contexts], repeat)
+            warm_ms = seconds / len(contexts) * 1000
+            build = f"{build_seconds:9.2f}" if name == "index" else " " * 9
+            print(f"{rows:>9} {name:>10} {build} {cold_ms:>10.3f} {warm_ms:>10.3f}")
+
+        expected = next(iter(rankings.values()))
+        for name, ranking in rankings.items():
+            if ranking != expected:
+                raise AssertionError(f"{name} ranking differs at {rows} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--reference-limit", type=int, default=1_000_000,
+                        help="skip the per-row reference loop above this many rows")
+    args = parser.parse_args()
+    run(args.sizes, args.repeat, args.k, args.reference_limit)
+
+
+if __name__ == "__main__":
+    main()
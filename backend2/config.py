@@ -6,4 +6,39 @@ load_dotenv(override=True)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GOOGLE_MAPS_API_KEY=os.getenv("GOOGLE_MAPS_API_KEY")
 USERS_FILE = os.getenv("USERS_FILE")
-APARTMENT_DATA = os.getenv("APARTMENT_DATA")
\ No newline at end of file
+APARTMENT_DATA = os.getenv("APARTMENT_DATA")
+
+# Chat exchanges sent verbatim each turn; older ones are folded into a running summary
+CHAT_MEMORY_RECENT_TURNS = int(os.getenv("CHAT_MEMORY_RECENT_TURNS", "3"))
+# Number of properties PropertyFilter passes to the prompt per turn
+PROPERTY_TOP_K = int(os.getenv("PROPERTY_TOP_K", "4"))
+# PropertyFilter scoring engine: "python" (inverted index) or "numpy" (vectorized)
+SCORING_BACKEND = os.getenv("SCORING_BACKEND", "python")
+# Maximum Gemini calls in flight at once; further chat turns queue for a worker
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Chat sessions idle for longer than this are evicted
+SESSION_IDLE_TTL_SECONDS = int(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+# Least recently used sessions are evicted beyond this count
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+# Least recently used sessions are evicted once their estimated memory passes this
+SESSION_MEMORY_HIGH_WATER_MB = float(os.getenv("SESSION_MEMORY_HIGH_WATER_MB", "256"))
+# How often the background sweeper looks for idle sessions
+SESSION_SWEEP_INTERVAL_SECONDS = int(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))
+# Where chat session state lives: "memory" (single worker), "sqlite" (workers on one host) or "redis"
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "sessions.db")
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+# SQLite database holding registered users
+DATABASE_FILE = os.getenv("DATABASE_FILE", "app.db")
+# Google Places nearby lookups: (connect, read) timeouts and the persistent result cache
+PLACES_CONNECT_TIMEOUT_SECONDS = float(os.getenv("PLACES_CONNECT_TIMEOUT_SECONDS", "3.05"))
+PLACES_READ_TIMEOUT_SECONDS = float(os.getenv("PLACES_READ_TIMEOUT_SECONDS", "10"))
+PLACES_CACHE_FILE = os.getenv("PLACES_CACHE_FILE", "places_cache.db")
+# Cached results are fresh for this long, then served stale while one background refresh runs
+PLACES_CACHE_TTL_SECONDS = int(os.getenv("PLACES_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+PLACES_CACHE_STALE_SECONDS = int(os.getenv("PLACES_CACHE_STALE_SECONDS", str(30 * 24 * 3600)))
+# Batch precompute of nearby places for every building: worker threads and upstream calls per second
+PLACES_PRECOMPUTE_WORKERS = int(os.getenv("PLACES_PRECOMPUTE_WORKERS", "4"))
+PLACES_PRECOMPUTE_RATE_PER_SECOND = float(os.getenv("PLACES_PRECOMPUTE_RATE_PER_SECOND", "5"))
+# Refresh buildings with new or moved coordinates in the background after an upload
+PLACES_PRECOMPUTE_ON_UPLOAD = os.getenv("PLACES_PRECOMPUTE_ON_UPLOAD", "true").lower() == "true"
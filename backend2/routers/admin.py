@@ -1,11 +1,11 @@
 import io
 import logging
 import json
-from pathlib import Path
 import pandas as pd
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from config import USERS_FILE, APARTMENT_DATA
+from config import APARTMENT_DATA
 from routers.property import load_property_bot
+from utils.authUtils import list_users as list_registered_users
 
 logger = logging.getLogger(__name__)
 
@@ -17,17 +17,9 @@ router = APIRouter(
 
 @router.get("/list-users")
 def list_users():
-    file_path = Path(USERS_FILE)
-
-    if not file_path.exists():
-        return {"message": "User registration file not found.", "users": []}
-
-    with open(file_path, "r") as file:
-        data = json.load(file)
-
     users = []
-    for user in data.values():
-        if user.get("name", "").lower() != "admin":
+    for user in list_registered_users():
+        if (user.get("name") or "").lower() != "admin":
             users.append({
                 "name": user.get("name"),
                 "phone": user.get("phone"),
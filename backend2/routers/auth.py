@@ -2,7 +2,7 @@ import logging
 from datetime import datetime
 from models.auth import UserSignup, UserLogin, UserResponse
 from fastapi import APIRouter, HTTPException
-from utils.authUtils import load_users, generate_user_id, hash_password, save_users, verify_password
+from utils.authUtils import create_user, find_existing_user, generate_user_id, get_user_by_email, hash_password, verify_password
 
 logger = logging.getLogger(__name__)
 
@@ -15,14 +15,11 @@ router = APIRouter(
 @router.post("/signup")
 def signup(user_data: UserSignup):
     """Register a new user"""
-    users = load_users()
-    
-    # Check if user already exists
-    if any(user["email"] == user_data.email for user in users.values()):
+    # Check if user or phone already exists
+    existing = find_existing_user(user_data.email, user_data.phone)
+    if existing == "email":
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Check if phone already exists
-    if any(user["phone"] == user_data.phone for user in users.values()):
+    if existing == "phone":
         raise HTTPException(status_code=400, detail="Phone number already registered")
     
     # Create new user
@@ -36,9 +33,9 @@ def signup(user_data: UserSignup):
         "created_at": datetime.now().isoformat()
     }
     
-    # Save user
-    users[user_id] = new_user
-    save_users(users)
+    # Save user; the unique indexes reject a concurrent duplicate signup
+    if not create_user(new_user):
+        raise HTTPException(status_code=400, detail="Email or phone number already registered")
     
     # Return user data (without password)
     user_response = UserResponse(
@@ -57,14 +54,8 @@ def signup(user_data: UserSignup):
 @router.post("/login")
 def login(user_credentials: UserLogin):
     """Authenticate user login"""
-    users = load_users()
-    
     # Find user by email
-    user = None
-    for user_data in users.values():
-        if user_data["email"] == user_credentials.email:
-            user = user_data
-            break
+    user = get_user_by_email(user_credentials.email)
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
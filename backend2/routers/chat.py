@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime
 import logging
 from models.chat import ChatRequest, ChatResponse
 from services.chatbot import EnhancedPropertyChatbot
+from services.session_manager import SessionManager
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +13,7 @@ router = APIRouter(
     tags=["chat"],
     responses={404: {"description": "Not found"}},
 )
-sessions = {}
+sessions = SessionManager(EnhancedPropertyChatbot)
 
 @router.post("/", response_model=ChatResponse)
 async def chat(request: ChatRequest):
@@ -19,11 +21,11 @@ async def chat(request: ChatRequest):
     try:
         session_id = request.session_id 
         
-        if session_id not in sessions:
-            raise HTTPException(status_code=404, detail="Invalid session ID")
-        
-        session_chatbot = sessions[session_id]
-        response, suggestions = session_chatbot.get_ai_response(request.query)
+        async with sessions.checkout(session_id) as session_chatbot:
+            if session_chatbot is None:
+                raise HTTPException(status_code=404, detail="Invalid session ID")
+
+            response, suggestions = await session_chatbot.get_ai_response_async(request.query)
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         return ChatResponse(
@@ -41,8 +43,7 @@ async def chat(request: ChatRequest):
 async def create_session():
     """Create a new chat session"""
     try:
-        session_id = f"session_{datetime.now().timestamp()}"
-        sessions[session_id] = EnhancedPropertyChatbot()
+        session_id = await run_in_threadpool(sessions.create)
         return {"session_id": session_id, "message": "Session created successfully"}
     except Exception as e:
         logger.error(f"Error creating session: {str(e)}")
@@ -52,8 +53,7 @@ async def create_session():
 async def clear_session(session_id: str):
 
     try:
-        if session_id in sessions:
-            del sessions[session_id]
+        if await run_in_threadpool(sessions.delete, session_id):
             return {"message": f"Session {session_id} cleared successfully"}
         else:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -64,10 +64,9 @@ async def clear_session(session_id: str):
 @router.get("/sessions")
 async def get_active_sessions():
     try:
-        active_sessions = list(sessions.keys())
         return {
-            "active_sessions": active_sessions,
-            "total_sessions": len(active_sessions)
+            "active_sessions": await run_in_threadpool(sessions.ids),
+            **(await run_in_threadpool(sessions.stats))
         }
     except Exception as e:
         logger.error(f"Error getting sessions: {str(e)}")
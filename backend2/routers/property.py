@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, List
 import requests
 import math
 import logging
 from models.property import PropertyDetailsRequest, PropertyDetailsResponse, PropertyDeitail
 from services.chatbot import EnhancedPropertyChatbot
+from services.catalog import reload_catalog
+from services.places_precompute import schedule_precompute
+from config import PLACES_PRECOMPUTE_ON_UPLOAD
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +18,12 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-chatbot = None
+chatbot = EnhancedPropertyChatbot()
 def load_property_bot():
-    global chatbot
-    chatbot = EnhancedPropertyChatbot()
-
-load_property_bot()
+    """Reload the shared property catalog; every session picks it up on its next turn"""
+    catalog = reload_catalog()
+    if PLACES_PRECOMPUTE_ON_UPLOAD:
+        schedule_precompute(catalog.properties)
 
 @router.post("/details", response_model=PropertyDetailsResponse)
 async def get_property_details(request: PropertyDetailsRequest):
@@ -75,11 +79,7 @@ async def find_nearby(request: PropertyDeitail):
         place_type = request.place_type
 
         # Find the property
-        target_property = None
-        for prop in chatbot.properties_data:
-            if property_name.lower() in prop.get('Building Name', '').lower():
-                target_property = prop
-                break
+        target_property = chatbot.catalog.find_by_name(property_name)
         
         if not target_property:
             raise HTTPException(
@@ -97,7 +97,7 @@ async def find_nearby(request: PropertyDeitail):
             )
         
         # Find nearby places
-        nearby_result = chatbot.find_nearby_places(lat, lng, place_type)
+        nearby_result = await run_in_threadpool(chatbot.find_nearby_places, lat, lng, place_type)
         
         logger.info(f"Found {len(nearby_result)} nearby places for {property_name} ({place_type})")
         return {
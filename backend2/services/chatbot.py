@@ -1,28 +1,48 @@
-import json
+import asyncio
 import google.generativeai as genai
-import os
 import logging
-from typing import List, Dict, Tuple
-from logging import basicConfig, INFO,Logger
+import threading
+from typing import Any, List, Dict, Tuple, Optional
 from services.property_filter import PropertyFilter
 from services.preference_extractor import PreferenceExtractor
 from services.response_generator import ResponseGenerator
-from utils.utils import get_prompt, get_greeting
-import logging
-from config import GEMINI_API_KEY, GOOGLE_MAPS_API_KEY
-from logging import Logger as logger
-import requests
+from services.catalog import PropertyCatalog, get_catalog
+from services.places_service import get_places_service
+from services.conversation_summary import ConversationSummary, get_catalog_matcher
+from services.llm_executor import run_blocking
+from utils.utils import get_prompt
+from config import GEMINI_API_KEY, CHAT_MEMORY_RECENT_TURNS
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model(api_key: str = None):
+    """Configure Gemini once per process and return the shared model"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                if not api_key:
+                    api_key = GEMINI_API_KEY
+
+                if not api_key:
+                    raise Exception("API key not found. Please set GEMINI_API_KEY in your .env file.")
+
+                genai.configure(api_key=api_key)
+                _model = genai.GenerativeModel('gemini-2.0-flash')
+                logger.info("Gemini API configured successfully!")
+    return _model
+
 
 class EnhancedPropertyChatbot:
-    def __init__(self, properties_file="apartments.json"):
-        self.logger = logging.getLogger(__name__)  
-        self.properties_file = properties_file
-        self.properties_data = self.load_properties()
-        
-        # Initialize modular components
-        self.property_filter = PropertyFilter(self.properties_data)
-        self.preference_extractor = PreferenceExtractor(self.properties_data)
-        self.response_generator = ResponseGenerator(self.properties_data)
+    def __init__(self, catalog: Optional[PropertyCatalog] = None):
+        self.logger = logger
+
+        # Pinned catalog, or None to always follow the process-wide catalog
+        self._catalog = catalog
         
         # Initialize conversation state
         self.conversation_context = {
@@ -32,35 +52,53 @@ class EnhancedPropertyChatbot:
             "current_focus": None
         }
         self.chat_memory = []
-        self.logger = logging.getLogger(__name__)
+        # Exchanges that have left chat_memory, folded into a bounded summary
+        self.summary = ConversationSummary()
+        # Serializes turns of this session; other sessions run concurrently
+        self._turn_lock = asyncio.Lock()
         self.configure_gemini()
 
-    def load_properties(self) -> List[Dict]:
-        """Load properties from JSON file"""
-        try:
-            if os.path.exists(self.properties_file):
-                with open(self.properties_file, 'r', encoding='utf-8') as file:
-                    return json.load(file)
-            else:
-                self.logger.error(f"Properties file '{self.properties_file}' not found!")
-                return []
-        except Exception as e:
-            self.logger(f"Error loading properties: {str(e)}")
-            return []
+    def to_state(self) -> Dict[str, Any]:
+        """Serializable conversation state, restored by from_state"""
+        return {
+            "conversation_context": self.conversation_context,
+            "chat_memory": self.chat_memory,
+            "summary": self.summary.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], catalog: Optional[PropertyCatalog] = None) -> "EnhancedPropertyChatbot":
+        """Rebuild a session from to_state output"""
+        chatbot = cls(catalog)
+        chatbot.conversation_context = state.get("conversation_context", chatbot.conversation_context)
+        chatbot.chat_memory = state.get("chat_memory", [])
+        chatbot.summary = ConversationSummary(state.get("summary"))
+        return chatbot
+
+    @property
+    def catalog(self) -> PropertyCatalog:
+        return self._catalog or get_catalog()
+
+    @property
+    def properties_data(self) -> Tuple[Dict, ...]:
+        return self.catalog.properties
+
+    @property
+    def property_filter(self) -> PropertyFilter:
+        return self.catalog.property_filter
+
+    @property
+    def preference_extractor(self) -> PreferenceExtractor:
+        return self.catalog.preference_extractor
+
+    @property
+    def response_generator(self) -> ResponseGenerator:
+        return self.catalog.response_generator
         
     def configure_gemini(self, api_key: str = None):
-        """Configure Gemini API"""
+        """Attach the shared Gemini model to this session"""
         try:
-            if not api_key:
-                api_key = GEMINI_API_KEY 
-            
-            if not api_key:
-                raise Exception("API key not found. Please set GEMINI_API_KEY in your .env file.")
-            
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
-            self.logger.info("Gemini API configured successfully!")
-            
+            self.model = get_model(api_key)
         except Exception as e:
             self.logger.error(f"Error configuring Gemini API: {str(e)}")
             raise e
@@ -79,26 +117,25 @@ class EnhancedPropertyChatbot:
             "current_focus": None
         }
         self.chat_memory = []
+        self.summary = ConversationSummary()
     
     def get_greeting_response(self) -> str:
-        """Generate a brief personalized greeting response using utils"""
-        total_properties = len(self.properties_data)
-        locations = list(set(prop['Location'] for prop in self.properties_data))
-        greeting = get_greeting(total_properties, locations)
-        return greeting
+        """Brief greeting listing the catalog, rendered once per catalog version"""
+        return self.catalog.greeting
     
     def generate_enhanced_prompt(self, user_query: str, filtered_properties: List[Dict]) -> str:
         property_context = self.response_generator.create_contextual_property_summary(
             filtered_properties, self.conversation_context
         )
         memory_context = self.response_generator.build_enhanced_memory_context(
-            self.chat_memory, self.conversation_context
+            self.chat_memory, self.conversation_context, self.summary.render()
         )
         
-        total_properties = len(self.properties_data)
-        locations = list(set(prop['Location'] for prop in self.properties_data))
+        catalog = self.catalog
         
-        prompt = get_prompt(user_query, property_context, memory_context, total_properties, locations)
+        # Only the turn sections are rendered here; the prefix was rendered once for this catalog version
+        prompt = get_prompt(user_query, property_context, memory_context, len(catalog), catalog.locations,
+                            prefix=catalog.prompt_prefix)
         return prompt
     
     def get_ai_response(self, user_query: str) -> Tuple[str, List[str]]:
@@ -134,6 +171,7 @@ class EnhancedPropertyChatbot:
                 if prop_name not in self.conversation_context["mentioned_properties"]:
                     self.conversation_context["mentioned_properties"].append(prop_name)
             
+            self.fold_old_turns()
             return formatted_response, suggestions
             
         except Exception as e:
@@ -141,6 +179,21 @@ class EnhancedPropertyChatbot:
             error_response = f"Sorry, I encountered an error: {str(e)}. Please try a simpler question."
             return error_response, []
     
+    def fold_old_turns(self):
+        """Fold exchanges beyond the recent window into the running summary, once each"""
+        overflow = len(self.chat_memory) - CHAT_MEMORY_RECENT_TURNS
+        if overflow <= 0:
+            return
+        matcher = get_catalog_matcher(self.catalog)
+        for exchange in self.chat_memory[:overflow]:
+            self.summary.fold(exchange["user"], exchange["assistant"], matcher)
+        del self.chat_memory[:overflow]
+    
+    async def get_ai_response_async(self, user_query: str) -> Tuple[str, List[str]]:
+        """Run get_ai_response on the LLM executor without blocking the event loop"""
+        async with self._turn_lock:
+            return await run_blocking(self.get_ai_response, user_query)
+    
     def get_property_details(self, property_name: str) -> str:
         """Get detailed information about a specific property"""
         return self.response_generator.get_property_details(property_name)
@@ -162,71 +215,15 @@ class EnhancedPropertyChatbot:
     def get_conversation_stats(self) -> Dict[str, any]:
         """Get conversation statistics"""
         return {
-            "total_messages": len(self.chat_memory),
+            "total_messages": self.summary.turns + len(self.chat_memory),
             "mentioned_properties": len(self.conversation_context.get("mentioned_properties", [])),
             "user_preferences": self.conversation_context.get("user_preferences", {}),
             "properties_in_database": len(self.properties_data)
         }
     
     def find_nearby_places(self, lat, lng, place_type="school", radius=2000):
-        """Find nearby places using Google Places API"""
-        google_api_key = GOOGLE_MAPS_API_KEY
-        if not google_api_key:
-            return {"error": "Google Maps API key not configured"}
-        
-        # Map common requests to Google Places types
-        type_mapping = {
-            'school': 'school',
-            'hospital': 'hospital',
-            'mall': 'shopping_mall',
-            'shopping': 'shopping_mall',
-            'restaurant': 'restaurant',
-            'bank': 'bank',
-            'pharmacy': 'pharmacy',
-            'gym': 'gym',
-            'park': 'park',
-            'airport': 'airport',
-            'bus': 'bus_station',
-            'railway': 'train_station',
-            'temple': 'hindu_temple',
-            'church': 'church',
-            'mosque': 'mosque'
-        }
-        
-        google_type = type_mapping.get(place_type.lower(), place_type)
-        
-        url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-        params = {
-            'location': f"{lat},{lng}",
-            'radius': radius,
-            'type': google_type,
-            'key': google_api_key
-        }
-        
-        try:
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            if data.get('status') == 'OK':
-                places = []
-                for place in data.get('results', [])[:8]:  # Limit to 8 results
-                    place_info = {
-                        'name': place.get('name'),
-                        'vicinity': place.get('vicinity'),
-                        'rating': place.get('rating'),
-                        'types': place.get('types', []),
-                        'location': place.get('geometry', {}).get('location', {}),
-                        'price_level': place.get('price_level'),
-                        'photos': place.get('photos', [])
-                    }
-                    places.append(place_info)
-                
-                return {"places": places, "count": len(places)}
-            else:
-                return {"error": f"Google Places API error: {data.get('status')}"}
-        
-        except Exception as e:
-            return {"error": f"Error calling Google Places API: {str(e)}"}
+        """Find nearby places using Google Places API, through the shared cached places service"""
+        return get_places_service().find_nearby_places(lat, lng, place_type, radius)
 
 
 def smart_property_filter_enhanced(query: str, properties_data: List[Dict]) -> List[Dict]:
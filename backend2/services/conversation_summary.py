@@ -0,0 +1,160 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.keyword_automaton import KeywordAutomaton
+
+# Entries kept per list of the running summary; the oldest drop off first
+SUMMARY_MAX_BUILDINGS = 8
+SUMMARY_MAX_LOCATIONS = 4
+SUMMARY_MAX_REQUESTS = 5
+# Earlier user requests are kept up to this many characters
+SUMMARY_REQUEST_CHARS = 120
+
+# A clause containing one of these rejects the buildings and locations it names
+REJECTION_PATTERN = re.compile(
+    r"\b(?:not interested|not keen|not for me|not in|no more|(?:don'?t|do not) (?:like|want|need)|"
+    r"doesn'?t (?:suit|work)|too (?:expensive|costly|pricey|far|small)|out of (?:my )?budget|"
+    r"rule out|ruled out|skip|avoid|exclude|remove|reject|drop|except|other than|instead of)\b"
+)
+CLAUSE_PATTERN = re.compile(r"[.;!?,\n]+|\bbut\b")
+
+_matchers: Dict[str, KeywordAutomaton] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_catalog_matcher(catalog) -> KeywordAutomaton:
+    """Building and location names of a catalog in one automaton, built once per catalog version"""
+    matcher = _matchers.get(catalog.version)
+    if matcher is None:
+        with _matchers_lock:
+            matcher = _matchers.get(catalog.version)
+            if matcher is None:
+                keywords = [
+                    (prop["Building Name"].lower(), ("building", prop["Building Name"]))
+                    for prop in catalog.properties if isinstance(prop.get("Building Name"), str)
+                ]
+                keywords += [(location.lower(), ("location", location)) for location in catalog.locations]
+                matcher = KeywordAutomaton(keywords)
+                # Only the current catalog version is ever needed again
+                _matchers.clear()
+                _matchers[catalog.version] = matcher
+    return matcher
+
+
+def find_names(text_lower: str, matcher: KeywordAutomaton) -> List[Tuple[str, str]]:
+    """(kind, name) of every building or location named in text, skipping names inside longer matches"""
+    matches = sorted(matcher.finditer(text_lower), key=lambda match: (match[0], -match[1]))
+    names = []
+    covered_until = -1
+    for start, end, _, payload in matches:
+        if end <= covered_until:
+            continue
+        covered_until = end
+        names.append(payload)
+    return list(dict.fromkeys(names))
+
+
+def _remember(items: List[str], name: str, limit: int):
+    if name in items:
+        items.remove(name)
+    items.append(name)
+    del items[:-limit]
+
+
+def _discard(items: List[str], name: str):
+    if name in items:
+        items.remove(name)
+
+
+def format_preferences(preferences: Dict[str, Any]) -> str:
+    parts = []
+    for key, value in preferences.items():
+        if isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        elif isinstance(value, dict):
+            value = " ".join(f"{k} {v}" for k, v in value.items())
+        parts.append(f"{key}: {value}")
+    return "; ".join(parts)
+
+
+class ConversationSummary:
+    """Running summary of the chat turns that have left the recent window.
+
+    Each evicted turn is folded in once and then dropped: buildings and
+    locations the user names are filed as shortlisted or rejected by the
+    clause they appear in, buildings the assistant brought up are noted as
+    discussed, and the request itself joins a short list of earlier asks.
+    Every list is capped, so the rendered summary stays the same size
+    however long the conversation runs.
+    """
+
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.turns: int = state.get("turns", 0)
+        self.shortlisted: List[str] = list(state.get("shortlisted", []))
+        self.rejected: List[str] = list(state.get("rejected", []))
+        self.rejected_locations: List[str] = list(state.get("rejected_locations", []))
+        self.discussed: List[str] = list(state.get("discussed", []))
+        self.earlier_requests: List[str] = list(state.get("earlier_requests", []))
+
+    def __bool__(self) -> bool:
+        return self.turns > 0
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "shortlisted": self.shortlisted,
+            "rejected": self.rejected,
+            "rejected_locations": self.rejected_locations,
+            "discussed": self.discussed,
+            "earlier_requests": self.earlier_requests,
+        }
+
+    def fold(self, user_message: str, assistant_message: str, matcher: KeywordAutomaton):
+        """Fold one evicted exchange into the summary"""
+        for clause in CLAUSE_PATTERN.split(user_message.lower()):
+            rejecting = REJECTION_PATTERN.search(clause) is not None
+            for kind, name in find_names(clause, matcher):
+                if kind == "location":
+                    if rejecting:
+                        _remember(self.rejected_locations, name, SUMMARY_MAX_LOCATIONS)
+                    else:
+                        _discard(self.rejected_locations, name)
+                elif rejecting:
+                    _remember(self.rejected, name, SUMMARY_MAX_BUILDINGS)
+                    _discard(self.shortlisted, name)
+                else:
+                    _remember(self.shortlisted, name, SUMMARY_MAX_BUILDINGS)
+                    _discard(self.rejected, name)
+
+        for kind, name in find_names((assistant_message or "").lower(), matcher):
+            if kind == "building" and name not in self.shortlisted and name not in self.rejected:
+                _remember(self.discussed, name, SUMMARY_MAX_BUILDINGS)
+        for name in self.shortlisted + self.rejected:
+            _discard(self.discussed, name)
+
+        request = " ".join(user_message.split())
+        if len(request) > SUMMARY_REQUEST_CHARS:
+            request = request[:SUMMARY_REQUEST_CHARS - 3].rstrip() + "..."
+        _remember(self.earlier_requests, request, SUMMARY_MAX_REQUESTS)
+        self.turns += 1
+
+    def render(self, preferences: Optional[Dict[str, Any]] = None) -> str:
+        """Prompt text for the summary, empty until a turn has been folded"""
+        if not self:
+            return ""
+        lines = [f"Summary of {self.turns} earlier turns:"]
+        if preferences:
+            lines.append(f"Stated preferences: {format_preferences(preferences)}")
+        if self.shortlisted:
+            lines.append(f"Shortlisted buildings: {', '.join(self.shortlisted)}")
+        if self.rejected:
+            lines.append(f"Rejected buildings: {', '.join(self.rejected)}")
+        if self.rejected_locations:
+            lines.append(f"Rejected locations: {', '.join(self.rejected_locations)}")
+        if self.discussed:
+            lines.append(f"Also discussed: {', '.join(self.discussed)}")
+        if self.earlier_requests:
+            lines.append(f"Earlier requests: {' | '.join(self.earlier_requests)}")
+        return "\n".join(lines)
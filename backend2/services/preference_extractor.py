@@ -1,29 +1,72 @@
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from services.keyword_automaton import KeywordAutomaton
+from services.property_columns import parse_commute_limit, parse_commute_times
+
+BHK_PATTERN = re.compile(r'(\d+)\s*bhk')
+AMOUNT = r'(\d+(?:\.\d+)?)'
+BUDGET_UNIT = r'(lakhs?|lacs?|l|crores?|cr)\b'
+BUDGET_MAX_PATTERN = re.compile(
+    rf'(?:under|below|within|max|maximum|upto|up to|less than)\s*(?:₹|rs\.?\s*)?{AMOUNT}\s*{BUDGET_UNIT}'
+)
+# The separator is required, so "100 lakhs" is not read as a 10 to 0 range
+BUDGET_RANGE_PATTERN = re.compile(
+    rf'{AMOUNT}(?:\s*{BUDGET_UNIT})?\s*(?:to|-|and)\s*(?:₹|rs\.?\s*)?{AMOUNT}\s*{BUDGET_UNIT}'
+)
+BUDGET_SINGLE_PATTERN = re.compile(rf'(?:budget|price).*?{AMOUNT}\s*{BUDGET_UNIT}')
+
+PROXIMITY_KEYWORDS = {
+    'airport': ['airport', 'mangalore airport'],
+    'school': ['school', 'schools', 'education'],
+    'hospital': ['hospital', 'medical', 'healthcare'],
+    'mall': ['mall', 'shopping', 'market'],
+    'beach': ['beach', 'seaside', 'coast'],
+    'railway': ['railway', 'train', 'station'],
+    'college': ['college', 'university']
+}
+
+AMENITY_KEYWORDS = [
+    'gym', 'pool', 'swimming', 'parking', 'garden', 
+    'playground', 'security', 'elevator', 'lift'
+]
+
+
+def to_lakhs(amount: str, unit: Optional[str]) -> Any:
+    """Budget figure in lakhs; crore amounts are multiplied by 100"""
+    value = float(amount) * (100 if unit and unit.startswith('cr') else 1)
+    return int(value) if value.is_integer() else value
+
 
 class PreferenceExtractor:
-    """Extract and manage user preferences from queries and chat history"""
+    """Extract and manage user preferences from queries and chat history.
+
+    Everything that depends on the catalog is compiled once per catalog
+    version: location names, proximity keywords and amenity keywords share
+    one keyword automaton, so a query is scanned for all of them in a
+    single pass. Results follow the old per-keyword `in` checks: the first
+    matching location in catalog order, the first matching proximity key
+    in PROXIMITY_KEYWORDS order and amenities in AMENITY_KEYWORDS order.
+    """
     
     def __init__(self, properties_data: List[Dict]):
         self.properties_data = properties_data
-        self._setup_location_keywords()
-    
-    def _setup_location_keywords(self):
-        """Setup location-based keywords mapping"""
-        self.location_keywords = {
-            'airport': ['airport', 'mangalore airport'],
-            'school': ['school', 'schools', 'education'],
-            'hospital': ['hospital', 'medical', 'healthcare'],
-            'mall': ['mall', 'shopping', 'market'],
-            'beach': ['beach', 'seaside', 'coast'],
-            'railway': ['railway', 'train', 'station'],
-            'college': ['college', 'university']
-        }
-        
-        self.amenity_keywords = [
-            'gym', 'pool', 'swimming', 'parking', 'garden', 
-            'playground', 'security', 'elevator', 'lift'
+        self.locations = list(dict.fromkeys(
+            prop['Location'] for prop in properties_data if prop.get('Location')
+        ))
+        self.commute_destinations = list(dict.fromkeys(
+            destination for prop in properties_data for destination in parse_commute_times(prop.get('Commute Times'))
+        ))
+        self.location_keywords = PROXIMITY_KEYWORDS
+        self.amenity_keywords = AMENITY_KEYWORDS
+        self._near_keys = list(PROXIMITY_KEYWORDS)
+
+        keywords = [(location.lower(), ("location", rank)) for rank, location in enumerate(self.locations)]
+        keywords += [
+            (keyword, ("near", rank))
+            for rank, key in enumerate(self._near_keys) for keyword in PROXIMITY_KEYWORDS[key]
         ]
+        keywords += [(amenity, ("amenity", rank)) for rank, amenity in enumerate(AMENITY_KEYWORDS)]
+        self._keywords = KeywordAutomaton(keywords)
     
     def extract_user_preferences(self, query: str, conversation_context: Dict[str, Any], 
                                chat_history: List = None) -> Dict[str, Any]:
@@ -32,56 +75,61 @@ class PreferenceExtractor:
         user_preferences = conversation_context.get("user_preferences", {})
         self._extract_bhk_preference(query_lower, user_preferences)
         self._extract_budget_preferences(query_lower, user_preferences)
-        self._extract_location_preferences(query_lower, user_preferences)
-        self._extract_proximity_preferences(query_lower, user_preferences)
-        self._extract_amenity_preferences(query_lower, user_preferences)
+        self._extract_keyword_preferences(query_lower, user_preferences)
+        self._extract_commute_preferences(query_lower, user_preferences)
         
         conversation_context["user_preferences"] = user_preferences
         return user_preferences
     
     def _extract_bhk_preference(self, query_lower: str, user_preferences: Dict[str, Any]):
         """Extract BHK preference from query"""
-        bhk_match = re.search(r'(\d+)\s*bhk', query_lower)
+        bhk_match = BHK_PATTERN.search(query_lower)
         if bhk_match:
             user_preferences["bhk"] = bhk_match.group(1)
     
     def _extract_budget_preferences(self, query_lower: str, user_preferences: Dict[str, Any]):
-        """Extract budget preferences from query"""
-        budget_match = re.search(r'(?:under|below|within|max|maximum)\s*(\d+)\s*(?:lakh|lakhs|l)', query_lower)
+        """Extract budget preferences in lakhs or crores from query"""
+        budget_match = BUDGET_MAX_PATTERN.search(query_lower)
         if budget_match:
-            user_preferences["max_budget"] = int(budget_match.group(1))
-        budget_range = re.search(r'(\d+)[-\s]*(?:to|-)?\s*(\d+)\s*(?:lakh|lakhs|l)', query_lower)
+            user_preferences["max_budget"] = to_lakhs(*budget_match.groups())
+        budget_range = BUDGET_RANGE_PATTERN.search(query_lower)
         if budget_range:
+            low, low_unit, high, high_unit = budget_range.groups()
             user_preferences["budget_range"] = {
-                "min": int(budget_range.group(1)),
-                "max": int(budget_range.group(2))
+                "min": to_lakhs(low, low_unit or high_unit),
+                "max": to_lakhs(high, high_unit)
             }
         
-        single_budget = re.search(r'(?:budget|price).*?(\d+)\s*(?:lakh|lakhs|l)', query_lower)
+        single_budget = BUDGET_SINGLE_PATTERN.search(query_lower)
         if single_budget and not user_preferences.get("max_budget") and not user_preferences.get("budget_range"):
-            user_preferences["max_budget"] = int(single_budget.group(1))
-    
-    def _extract_location_preferences(self, query_lower: str, user_preferences: Dict[str, Any]):
-        """Extract location preferences from query"""
-        locations = [prop['Location'] for prop in self.properties_data]
-        for location in locations:
-            if location.lower() in query_lower:
-                user_preferences["preferred_location"] = location
-                break
-    
-    def _extract_proximity_preferences(self, query_lower: str, user_preferences: Dict[str, Any]):
-        for key, keywords in self.location_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                user_preferences["near"] = key
-                break
+            user_preferences["max_budget"] = to_lakhs(*single_budget.groups())
     
-    def _extract_amenity_preferences(self, query_lower: str, user_preferences: Dict[str, Any]):
-        """Extract amenity preferences from query"""
-        preferred_amenities = [amenity for amenity in self.amenity_keywords if amenity in query_lower]
-        if preferred_amenities:
+    def _extract_keyword_preferences(self, query_lower: str, user_preferences: Dict[str, Any]):
+        """Extract location, proximity and amenity preferences in one scan of the query"""
+        location_rank = near_rank = None
+        amenity_ranks = set()
+        for _, _, _, (kind, rank) in self._keywords.finditer(query_lower):
+            if kind == "location":
+                location_rank = rank if location_rank is None else min(location_rank, rank)
+            elif kind == "near":
+                near_rank = rank if near_rank is None else min(near_rank, rank)
+            else:
+                amenity_ranks.add(rank)
+        
+        if location_rank is not None:
+            user_preferences["preferred_location"] = self.locations[location_rank]
+        if near_rank is not None:
+            user_preferences["near"] = self._near_keys[near_rank]
+        if amenity_ranks:
+            preferred_amenities = [AMENITY_KEYWORDS[rank] for rank in sorted(amenity_ranks)]
             existing_amenities = user_preferences.get("amenities", [])
-            all_amenities = list(set(existing_amenities + preferred_amenities))
-            user_preferences["amenities"] = all_amenities
+            user_preferences["amenities"] = list(dict.fromkeys(existing_amenities + preferred_amenities))
+    
+    def _extract_commute_preferences(self, query_lower: str, user_preferences: Dict[str, Any]):
+        """Extract a commute bound such as 'under 20 mins to airport'"""
+        max_commute = parse_commute_limit(query_lower, self.commute_destinations)
+        if max_commute:
+            user_preferences["max_commute"] = max_commute
     
     def get_user_preferences_summary(self, conversation_context: Dict[str, Any]) -> str:
         """Generate a readable summary of user preferences"""
@@ -107,6 +155,10 @@ class PreferenceExtractor:
         if user_prefs.get("near"):
             summary_parts.append(f"Near {user_prefs['near']}")
         
+        if user_prefs.get("max_commute"):
+            mc = user_prefs["max_commute"]
+            summary_parts.append(f"Within {mc['minutes']} mins of {mc['destination']}")
+        
         if user_prefs.get("amenities"):
             amenities_str = ", ".join(user_prefs["amenities"])
             summary_parts.append(f"Important amenities: {amenities_str}")
@@ -0,0 +1,160 @@
+import math
+import re
+from array import array
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+PRICE_NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+BHK_PATTERN = re.compile(r'(\d+)\s*bhk')
+SIZE_PATTERN = re.compile(r'(\d+)\s*bhk\s*[-:]\s*(\d+(?:\.\d+)?)\s*sq', re.IGNORECASE)
+COMMUTE_PATTERN = re.compile(r'([^:,]+?)\s*:\s*(\d+(?:\.\d+)?)\s*(mins?|minutes?|hrs?|hours?)\b', re.IGNORECASE)
+# "under 20 mins to the airport"; without a "to ..." tail the destination precedes it, as in "airport within 20 mins"
+COMMUTE_LIMIT_PATTERN = re.compile(
+    r'(?:under|below|within|less than|max|maximum|upto|up to)\s*(\d+(?:\.\d+)?)\s*(mins?|minutes?|hrs?|hours?)\b'
+    r'(?:\s*(?:drive\s+|commute\s+|away\s+)?(?:to|from|of)\s+(?:the\s+)?([a-z][a-z ]*))?'
+)
+
+# Other ways users name the commute destinations
+COMMUTE_ALIASES = {
+    'railway': 'railway station',
+    'station': 'railway station',
+    'train': 'railway station',
+    'city centre': 'city center',
+    'downtown': 'city center',
+    'it park': 'tech park',
+    'office': 'tech park',
+}
+
+NO_VALUE = math.nan
+
+
+def parse_price_range(price_range: Any) -> Optional[Tuple[float, float]]:
+    """Min and max lakh figures of a 'Price Range (Lakhs)' value such as '75 - 100'"""
+    if not price_range or (isinstance(price_range, float) and math.isnan(price_range)):
+        return None
+    numbers = [float(p) for p in PRICE_NUMBER_PATTERN.findall(str(price_range))]
+    if not numbers:
+        return None
+    return min(numbers), max(numbers)
+
+
+def parse_apartment_types(apartment_types: Any) -> FrozenSet[int]:
+    """BHK counts offered, e.g. '1BHK, 4BHK, 2BHK' -> {1, 2, 4}"""
+    return frozenset(int(n) for n in BHK_PATTERN.findall(str(apartment_types or "").lower()))
+
+
+def parse_apartment_sizes(apartment_sizes: Any) -> Dict[int, float]:
+    """Carpet area per BHK, e.g. '1BHK - 639 sqft, 2BHK - 858 sqft' -> {1: 639.0, 2: 858.0}"""
+    return {int(bhk): float(sqft) for bhk, sqft in SIZE_PATTERN.findall(str(apartment_sizes or ""))}
+
+
+def _to_minutes(value: str, unit: str) -> float:
+    return float(value) * (60 if unit.lower().startswith(('hr', 'hour')) else 1)
+
+
+def parse_commute_times(commute_times: Any) -> Dict[str, float]:
+    """Minutes per destination, e.g. 'Tech Park: 9 mins, Airport: 35 mins' -> {'tech park': 9.0, 'airport': 35.0}"""
+    return {
+        ' '.join(name.lower().split()): _to_minutes(value, unit)
+        for name, value, unit in COMMUTE_PATTERN.findall(str(commute_times or ""))
+    }
+
+
+def _match_destination(text: str, destinations: Sequence[str], at_end: bool) -> Optional[str]:
+    matches = text.endswith if at_end else text.startswith
+    for destination in sorted(destinations, key=len, reverse=True):
+        if matches(destination):
+            return destination
+    for alias, destination in COMMUTE_ALIASES.items():
+        if destination in destinations and matches(alias):
+            return destination
+    return None
+
+
+def parse_commute_limit(query_lower: str, destinations: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """Commute bound in a query, e.g. 'under 20 mins to airport' -> {'destination': 'airport', 'minutes': 20}"""
+    match = COMMUTE_LIMIT_PATTERN.search(query_lower)
+    if not match:
+        return None
+    minutes = _to_minutes(match.group(1), match.group(2))
+    if match.group(3):
+        destination = _match_destination(match.group(3).strip(), destinations, at_end=False)
+    else:
+        before = query_lower[:match.start()].rstrip()
+        if before.endswith(" in"):
+            before = before[:-3].rstrip()
+        destination = _match_destination(before, destinations, at_end=True)
+    if destination is None:
+        return None
+    return {"destination": destination, "minutes": int(minutes) if minutes.is_integer() else minutes}
+
+
+def parse_bhk_preference(value: Any) -> Optional[int]:
+    """Normalize a BHK preference ('2', 2, '2bhk') to an int, or None"""
+    if value is None or value == "":
+        return None
+    try:
+        return int(str(value).lower().replace("bhk", "").strip())
+    except ValueError:
+        return None
+
+
+class PropertyColumns:
+    """Numeric columns parsed once per catalog version.
+
+    Row i describes properties_data[i]. Prices are stored in float arrays with
+    NaN for missing values, offered BHK counts both as frozensets and as a
+    bitmask (bit n set for an nBHK unit), and per-BHK sizes in sqft.
+    Commute times form a property x destination matrix: one float column of
+    minutes per destination named in any 'Commute Times' value, NaN where a
+    property does not list that destination.
+    """
+
+    def __init__(self, properties_data: Sequence[Dict]):
+        self.size = len(properties_data)
+        self.price_min = array('d')
+        self.price_max = array('d')
+        self.bhk_mask = array('Q')
+        self.bhk_types: List[FrozenSet[int]] = []
+        self.sizes_sqft: List[Dict[int, float]] = []
+        self.bhk_postings: Dict[int, List[int]] = {}
+        self.commute_minutes: Dict[str, array] = {}
+
+        for i, prop in enumerate(properties_data):
+            bounds = parse_price_range(prop.get("Price Range (Lakhs)"))
+            self.price_min.append(bounds[0] if bounds else NO_VALUE)
+            self.price_max.append(bounds[1] if bounds else NO_VALUE)
+
+            bhk_types = parse_apartment_types(prop.get("Apartment Types"))
+            self.bhk_types.append(bhk_types)
+            mask = 0
+            for bhk in bhk_types:
+                self.bhk_postings.setdefault(bhk, []).append(i)
+                if bhk < 64:
+                    mask |= 1 << bhk
+            self.bhk_mask.append(mask)
+
+            self.sizes_sqft.append(parse_apartment_sizes(prop.get("Apartment Sizes")))
+
+            for destination, minutes in parse_commute_times(prop.get("Commute Times")).items():
+                column = self.commute_minutes.get(destination)
+                if column is None:
+                    column = self.commute_minutes[destination] = array('d', [NO_VALUE]) * self.size
+                column[i] = minutes
+
+    @property
+    def commute_destinations(self) -> List[str]:
+        return list(self.commute_minutes)
+
+    def price_bounds(self, i: int) -> Optional[Tuple[float, float]]:
+        if math.isnan(self.price_max[i]):
+            return None
+        return self.price_min[i], self.price_max[i]
+
+    def offers_bhk(self, i: int, bhk: int) -> bool:
+        return bhk in self.bhk_types[i]
+
+    def commute_to(self, i: int, destination: str) -> Optional[float]:
+        column = self.commute_minutes.get(destination)
+        if column is None or math.isnan(column[i]):
+            return None
+        return column[i]
@@ -1,38 +1,106 @@
-import re
-from typing import List, Dict, Any
+import heapq
+from collections import Counter
+from typing import List, Dict, Any, Optional
+from services.property_columns import PropertyColumns, parse_bhk_preference
+from services.property_index import PropertyIndex
+
+COMMUTE_WEIGHT = 12
+COMMUTE_STEP_MINUTES = 5
+
+
+def commute_score(minutes: float, max_minutes: float) -> int:
+    """Score for a commute within the user's limit: the base weight plus 1 per 5 minutes to spare"""
+    return COMMUTE_WEIGHT + int((max_minutes - minutes) // COMMUTE_STEP_MINUTES)
+
 
 class PropertyFilter:
     """Enhanced property filtering with context awareness"""
     
-    def __init__(self, properties_data: List[Dict]):
+    def __init__(self, properties_data: List[Dict], top_k: int = 4,
+                 columns: Optional[PropertyColumns] = None, scoring_backend: str = "python"):
         self.properties_data = properties_data
+        self.top_k = top_k
+        self.columns = columns or PropertyColumns(properties_data)
+        self.index = PropertyIndex(properties_data, self.columns)
+        self.scorer = None
+        if scoring_backend == "numpy":
+            from services.vectorized_scorer import VectorizedScorer
+            self.scorer = VectorizedScorer(properties_data, self.columns, self.index)
     
-    def smart_property_filter_enhanced(self, query: str, conversation_context: Dict[str, Any]) -> List[Dict]:
+    def smart_property_filter_enhanced(self, query: str, conversation_context: Dict[str, Any],
+                                       k: Optional[int] = None) -> List[Dict]:
         """Enhanced property filtering with context awareness"""
         query_lower = query.lower()
-        filtered_properties = []
-        scoring = {}
-        
-        for i, prop in enumerate(self.properties_data):
-            score = self._calculate_property_score(prop, query_lower, conversation_context)
-            
-            if score > 0:
-                scoring[i] = score
-                filtered_properties.append(prop)
-        
-        if scoring:
-            sorted_props = sorted(
-                filtered_properties, 
-                key=lambda x: scoring[self.properties_data.index(x)], 
-                reverse=True
-            )
-            return sorted_props[:4]
-        
-        return filtered_properties[:4]
+        if self.scorer:
+            ranked = self.scorer.top_k(query_lower, conversation_context, k or self.top_k)
+        else:
+            ranked = self._top_k(self._score_candidates(query_lower, conversation_context), k or self.top_k)
+        return [self.properties_data[i] for i in ranked]
     
-    def _calculate_property_score(self, prop: Dict, query_lower: str, conversation_context: Dict[str, Any]) -> int:
-        """Calculate relevance score for a property"""
+    @staticmethod
+    def _top_k(scoring: Dict[int, int], k: int) -> List[int]:
+        """Indices of the k best scores, ties broken by catalog order.
+
+        A bounded heap over (-score, index) pairs keeps this O(n log k) and
+        matches the order a stable full sort by descending score would give.
+        """
+        best = heapq.nsmallest(k, ((-score, i) for i, score in scoring.items()))
+        return [i for _, i in best]
+    
+    def _score_candidates(self, query_lower: str, conversation_context: Dict[str, Any]) -> Dict[int, int]:
+        """Score only the properties that appear in a posting list for the query.
+
+        Equivalent to running _calculate_property_score over every row
+        and keeping positive scores, but each criterion is answered from the
+        index instead of re-reading every property.
+        """
+        scores = Counter()
+        user_preferences = conversation_context.get("user_preferences", {})
+
+        if user_preferences.get("preferred_location"):
+            for i in self.index.location.lookup(user_preferences["preferred_location"]):
+                scores[i] += 10
+
+        pref_bhk = parse_bhk_preference(user_preferences.get("bhk"))
+        if pref_bhk is not None:
+            for i in self.index.bhk.get(pref_bhk, ()):
+                scores[i] += 8
+
+        if user_preferences.get("max_budget"):
+            for i in self.index.prices.max_at_most(user_preferences["max_budget"]):
+                scores[i] += 6
+
+        if user_preferences.get("budget_range"):
+            budget_range = user_preferences["budget_range"]
+            for i in self.index.prices.overlapping(budget_range["min"], budget_range["max"]):
+                scores[i] += 6
+
+        if user_preferences.get("amenities"):
+            for amenity in user_preferences["amenities"]:
+                for i in self.index.amenities.lookup(amenity):
+                    scores[i] += 3
+
+        if user_preferences.get("near"):
+            near_what = user_preferences["near"]
+            near_matches = self.index.commute_times.lookup(near_what) | self.index.nearby_locations.lookup(near_what)
+            for i in near_matches:
+                scores[i] += 12
+
+        max_commute = user_preferences.get("max_commute")
+        if max_commute:
+            for i, minutes in self.index.commute.within(max_commute["destination"], max_commute["minutes"]):
+                scores[i] += commute_score(minutes, max_commute["minutes"])
+
+        for word in self._query_words(query_lower):
+            for i in self.index.searchable.lookup(word):
+                scores[i] += 1
+
+        return {i: score for i, score in scores.items() if score > 0}
+
+    def _calculate_property_score(self, i: int, query_lower: str, conversation_context: Dict[str, Any]) -> int:
+        """Calculate relevance score for the property in row i"""
         score = 0
+        prop = self.properties_data[i]
         user_preferences = conversation_context.get("user_preferences", {})
         
         if user_preferences.get("preferred_location"):
@@ -40,12 +108,11 @@ class PropertyFilter:
             if pref_loc.lower() in prop.get("Location", "").lower():
                 score += 10
         
-        if user_preferences.get("bhk"):
-            pref_bhk = user_preferences["bhk"]
-            if f"{pref_bhk}bhk" in prop.get("Apartment Types", "").lower():
-                score += 8
+        pref_bhk = parse_bhk_preference(user_preferences.get("bhk"))
+        if pref_bhk is not None and self.columns.offers_bhk(i, pref_bhk):
+            score += 8
         
-        score += self._calculate_budget_score(prop, user_preferences)
+        score += self._calculate_budget_score(i, user_preferences)
         
         if user_preferences.get("amenities"):
             pref_amenities = user_preferences["amenities"]
@@ -62,35 +129,34 @@ class PropertyFilter:
             if near_what in commute_times or near_what in nearby_locations:
                 score += 12
         
+        max_commute = user_preferences.get("max_commute")
+        if max_commute:
+            minutes = self.columns.commute_to(i, max_commute["destination"])
+            if minutes is not None and minutes <= max_commute["minutes"]:
+                score += commute_score(minutes, max_commute["minutes"])
+        
         score += self._calculate_text_match_score(prop, query_lower)
         
         return score
     
-    def _calculate_budget_score(self, prop: Dict, user_preferences: Dict[str, Any]) -> int:
-        """Calculate budget-based score for a property"""
+    def _calculate_budget_score(self, i: int, user_preferences: Dict[str, Any]) -> int:
+        """Calculate budget-based score for the property in row i"""
         score = 0
-        prop_price_range = prop.get("Price Range (Lakhs)", "")
+        bounds = self.columns.price_bounds(i)
         
-        if not prop_price_range:
+        if not bounds:
             return score
         
+        prop_min_price, prop_max_price = bounds
+        
         if user_preferences.get("max_budget"):
-            max_budget = user_preferences["max_budget"]
-            price_numbers = re.findall(r'\d+', str(prop_price_range))
-            if price_numbers:
-                prop_max_price = max([int(p) for p in price_numbers])
-                if prop_max_price <= max_budget:
-                    score += 6
+            if prop_max_price <= user_preferences["max_budget"]:
+                score += 6
         
         if user_preferences.get("budget_range"):
             budget_range = user_preferences["budget_range"]
-            price_numbers = re.findall(r'\d+', str(prop_price_range))
-            if price_numbers:
-                prop_min_price = min([int(p) for p in price_numbers])
-                prop_max_price = max([int(p) for p in price_numbers])
-                
-                if (prop_min_price <= budget_range["max"] and prop_max_price >= budget_range["min"]):
-                    score += 6
+            if (prop_min_price <= budget_range["max"] and prop_max_price >= budget_range["min"]):
+                score += 6
         
         return score
     
@@ -98,9 +164,14 @@ class PropertyFilter:
         score = 0
         searchable_text = f"{prop.get('Building Name', '')} {prop.get('Location', '')} {prop.get('Apartment Types', '')} {prop.get('Amenities', '')}".lower()
         
-        query_words = [word for word in query_lower.split() if len(word) > 2]
+        query_words = self._query_words(query_lower)
         for word in query_words:
             if word in searchable_text:
                 score += 1
         
-        return score
\ No newline at end of file
+        return score
+
+    @staticmethod
+    def _query_words(query_lower: str) -> List[str]:
+        return [word for word in query_lower.split() if len(word) > 2]
+
@@ -0,0 +1,162 @@
+from bisect import bisect_right
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+from services.property_columns import PropertyColumns
+
+EMPTY: FrozenSet[int] = frozenset()
+
+
+class TokenIndex:
+    """Inverted index over one lowercased text field of every property.
+
+    Lookups keep the substring semantics of `needle in text`: a needle with no
+    whitespace can only occur inside a single whitespace-delimited token, so
+    its postings are the union of the postings of every vocabulary token that
+    contains it. Those tokens are found through an index of every 1- to
+    GRAM_SIZE-character substring of the vocabulary, so a lookup touches only
+    the tokens sharing the needle's n-grams, never the whole vocabulary.
+    Results are memoized per needle.
+    """
+
+    GRAM_SIZE = 3
+    MAX_CACHED_LOOKUPS = 4096
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = [str(text).lower() for text in texts]
+        self.postings: Dict[str, List[int]] = {}
+        for i, text in enumerate(self.texts):
+            for token in set(text.split()):
+                self.postings.setdefault(token, []).append(i)
+
+        # n-gram -> positions in self._tokens of the vocabulary tokens containing it
+        self._tokens = list(self.postings)
+        self._grams: Dict[str, List[int]] = {}
+        for t, token in enumerate(self._tokens):
+            grams = {
+                token[start:start + size]
+                for size in range(1, self.GRAM_SIZE + 1) for start in range(len(token) - size + 1)
+            }
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(t)
+        self._lookups: Dict[str, FrozenSet[int]] = {}
+
+    def lookup(self, needle: str) -> FrozenSet[int]:
+        """Indices of properties whose text contains needle"""
+        needle = needle.lower()
+        cached = self._lookups.get(needle)
+        if cached is not None:
+            return cached
+
+        pieces = needle.split()
+        if not pieces:
+            result = frozenset(i for i, text in enumerate(self.texts) if needle in text)
+        elif len(pieces) == 1 and pieces[0] == needle:
+            tokens = self._tokens_containing(needle)
+            if len(tokens) == 1:
+                result = frozenset(self.postings[self._tokens[tokens[0]]])
+            else:
+                matched = set()
+                for t in tokens:
+                    matched.update(self.postings[self._tokens[t]])
+                result = frozenset(matched)
+        else:
+            # Multi-word needles: intersect the pieces, then verify on the text
+            candidates = None
+            for piece in pieces:
+                piece_matches = self.lookup(piece)
+                candidates = piece_matches if candidates is None else candidates & piece_matches
+                if not candidates:
+                    break
+            result = frozenset(i for i in candidates if needle in self.texts[i])
+
+        if len(self._lookups) >= self.MAX_CACHED_LOOKUPS:
+            self._lookups.clear()
+        self._lookups[needle] = result
+        return result
+
+    def clear_cache(self):
+        """Forget memoized lookups"""
+        self._lookups.clear()
+
+    def _tokens_containing(self, needle: str) -> Sequence[int]:
+        """Positions of the vocabulary tokens that contain a whitespace-free needle"""
+        if len(needle) <= self.GRAM_SIZE:
+            return self._grams.get(needle, ())
+        grams = []
+        for start in range(len(needle) - self.GRAM_SIZE + 1):
+            tokens = self._grams.get(needle[start:start + self.GRAM_SIZE])
+            if not tokens:
+                return ()
+            grams.append(tokens)
+        grams.sort(key=len)
+        candidates = set(grams[0])
+        for tokens in grams[1:]:
+            candidates.intersection_update(tokens)
+            if not candidates:
+                return ()
+        # Shared n-grams do not guarantee the needle occurs in one piece
+        return [t for t in candidates if needle in self._tokens[t]]
+
+
+class PriceIndex:
+    """Sorted price bounds so budget filters become range scans"""
+
+    def __init__(self, bounds: Sequence[Optional[Tuple[float, float]]]):
+        priced = [(i, b) for i, b in enumerate(bounds) if b is not None]
+        by_max = sorted((b[1], i) for i, b in priced)
+        by_min = sorted((b[0], i) for i, b in priced)
+        self._max_values = [value for value, _ in by_max]
+        self._max_ids = [i for _, i in by_max]
+        self._min_values = [value for value, _ in by_min]
+        self._min_ids = [i for _, i in by_min]
+        self._bounds = bounds
+
+    def max_at_most(self, budget: float) -> FrozenSet[int]:
+        """Indices whose highest price is within budget"""
+        return frozenset(self._max_ids[:bisect_right(self._max_values, budget)])
+
+    def overlapping(self, low: float, high: float) -> FrozenSet[int]:
+        """Indices whose price range overlaps [low, high]"""
+        starts_below = self._min_ids[:bisect_right(self._min_values, high)]
+        return frozenset(i for i in starts_below if self._bounds[i][1] >= low)
+
+
+class CommuteIndex:
+    """Per-destination commute minutes in ascending order, so 'under N mins' is a prefix scan"""
+
+    def __init__(self, commute_minutes: Dict[str, Sequence[float]]):
+        self._minutes: Dict[str, List[float]] = {}
+        self._ids: Dict[str, List[int]] = {}
+        for destination, column in commute_minutes.items():
+            # NaN marks a property that does not list the destination
+            ordered = sorted((minutes, i) for i, minutes in enumerate(column) if minutes == minutes)
+            self._minutes[destination] = [minutes for minutes, _ in ordered]
+            self._ids[destination] = [i for _, i in ordered]
+
+    def within(self, destination: str, max_minutes: float) -> List[Tuple[int, float]]:
+        """(index, minutes) of properties at most max_minutes from destination, quickest first"""
+        minutes = self._minutes.get(destination, [])
+        end = bisect_right(minutes, max_minutes)
+        return list(zip(self._ids.get(destination, [])[:end], minutes[:end]))
+
+
+class PropertyIndex:
+    """Field indexes used by PropertyFilter, built once per catalog version"""
+
+    def __init__(self, properties_data: Sequence[Dict], columns: PropertyColumns):
+        self.size = len(properties_data)
+        self.searchable = TokenIndex([
+            f"{prop.get('Building Name', '')} {prop.get('Location', '')} {prop.get('Apartment Types', '')} {prop.get('Amenities', '')}"
+            for prop in properties_data
+        ])
+        self.location = TokenIndex([prop.get("Location", "") for prop in properties_data])
+        self.bhk = columns.bhk_postings
+        self.amenities = TokenIndex([prop.get("Amenities", "") for prop in properties_data])
+        self.commute_times = TokenIndex([prop.get("Commute Times", "") for prop in properties_data])
+        self.nearby_locations = TokenIndex([prop.get("Nearby Locations", "") for prop in properties_data])
+        self.prices = PriceIndex([columns.price_bounds(i) for i in range(columns.size)])
+        self.commute = CommuteIndex(columns.commute_minutes)
+
+    def clear_caches(self):
+        """Forget every memoized lookup; the BHK, price and commute indexes are built up front and hold none"""
+        for token_index in (self.searchable, self.location, self.amenities, self.commute_times, self.nearby_locations):
+            token_index.clear_cache()
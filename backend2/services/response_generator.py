@@ -135,9 +135,9 @@ class ResponseGenerator:
         ]
     
     def build_enhanced_memory_context(self, chat_memory: List[Dict], 
-                                    conversation_context: Dict[str, Any]) -> str:
-        """Build memory context for AI prompt"""
-        if not chat_memory:
+                                    conversation_context: Dict[str, Any], summary: str = "") -> str:
+        """Build memory context for AI prompt from preferences, the running summary and recent exchanges"""
+        if not chat_memory and not summary:
             return ""
         
         context = "CONVERSATION MEMORY:\n"
@@ -155,9 +155,11 @@ class ResponseGenerator:
                     prefs.append(f"{key}: {value}")
             context += "; ".join(prefs) + "\n\n"
         
-        # Add recent chat history (last 3 exchanges)
-        recent_history = chat_memory[-3:]
-        for exchange in recent_history:
+        if summary:
+            context += summary + "\n\n"
+        
+        # Add recent chat history; the chatbot folds older exchanges into the summary
+        for exchange in chat_memory:
             context += f"User: {exchange['user']}\n"
             assistant_response = exchange['assistant']
             if len(assistant_response) > 200:
@@ -0,0 +1,145 @@
+import threading
+from typing import Any, Dict, FrozenSet, List
+
+import numpy as np
+
+from services.property_columns import PropertyColumns, parse_bhk_preference
+from services.property_filter import COMMUTE_STEP_MINUTES, COMMUTE_WEIGHT
+from services.preference_extractor import AMENITY_KEYWORDS
+from services.property_index import PropertyIndex
+
+
+class VectorizedScorer:
+    """NumPy scoring backend for PropertyFilter.
+
+    Scores every row at once with the same weights as
+    PropertyFilter._calculate_property_score: budget masks over the price
+    columns, a BHK bitset, location codes, a packed amenity bitmap,
+    comparisons against the commute-time matrix and proximity/text masks
+    taken from the inverted index. Rankings are
+    identical to the pure-Python path, ties included.
+    """
+
+    # Cached per-term masks are one byte per row; keep the cache around 64MB
+    MASK_CACHE_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, properties_data, columns: PropertyColumns, index: PropertyIndex):
+        self.size = len(properties_data)
+        self.index = index
+        self.price_min = np.frombuffer(columns.price_min, dtype=np.float64).copy()
+        self.price_max = np.frombuffer(columns.price_max, dtype=np.float64).copy()
+        self.bhk_mask = np.array(columns.bhk_mask, dtype=np.uint64)
+        self.bhk_postings = columns.bhk_postings
+        self.commute_minutes = {
+            destination: np.frombuffer(column, dtype=np.float64).copy()
+            for destination, column in columns.commute_minutes.items()
+        }
+
+        locations = [str(prop.get("Location", "")).lower() for prop in properties_data]
+        self.location_values, codes = np.unique(np.array(locations, dtype=object), return_inverse=True)
+        self.location_codes = codes.astype(np.int32)
+
+        # One bit per amenity keyword the extractor knows, fixed at build time because
+        # the scorer is shared by every session; other amenities use cached masks
+        self.amenity_bits = np.zeros(self.size, dtype=np.uint64)
+        self._amenity_bit: Dict[str, int] = {}
+        for bit, amenity in enumerate(dict.fromkeys(AMENITY_KEYWORDS)):
+            if bit >= 64:
+                break
+            self._amenity_bit[amenity] = bit
+            self.amenity_bits[self._ids_array(index.amenities.lookup(amenity))] |= np.uint64(1 << bit)
+
+        self._masks: Dict[Any, np.ndarray] = {}
+        self._masks_lock = threading.Lock()
+        self._max_cached_masks = max(8, self.MASK_CACHE_BYTES // max(self.size, 1))
+
+    def score_all(self, query_lower: str, conversation_context: Dict[str, Any]) -> np.ndarray:
+        """Relevance score of every row for one query"""
+        scores = np.zeros(self.size, dtype=np.int32)
+        user_preferences = conversation_context.get("user_preferences", {})
+
+        if user_preferences.get("preferred_location"):
+            pref_loc = user_preferences["preferred_location"].lower()
+            matching_codes = [code for code, location in enumerate(self.location_values) if pref_loc in location]
+            scores += 10 * np.isin(self.location_codes, matching_codes)
+
+        pref_bhk = parse_bhk_preference(user_preferences.get("bhk"))
+        if pref_bhk is not None:
+            if 0 <= pref_bhk < 64:
+                scores += 8 * ((self.bhk_mask >> np.uint64(pref_bhk)) & np.uint64(1)).astype(np.int32)
+            else:
+                scores += 8 * self._ids_mask(("bhk", pref_bhk), frozenset(self.bhk_postings.get(pref_bhk, ())))
+
+        # NaN prices compare False, matching rows with no parsable price
+        if user_preferences.get("max_budget"):
+            scores += 6 * (self.price_max <= user_preferences["max_budget"])
+
+        if user_preferences.get("budget_range"):
+            budget_range = user_preferences["budget_range"]
+            scores += 6 * ((self.price_min <= budget_range["max"]) & (self.price_max >= budget_range["min"]))
+
+        if user_preferences.get("amenities"):
+            for amenity in user_preferences["amenities"]:
+                scores += 3 * self._amenity_mask(amenity)
+
+        if user_preferences.get("near"):
+            near_what = user_preferences["near"]
+            near_ids = self.index.commute_times.lookup(near_what) | self.index.nearby_locations.lookup(near_what)
+            scores += 12 * self._ids_mask(("near", near_what), near_ids)
+
+        max_commute = user_preferences.get("max_commute")
+        if max_commute and max_commute["destination"] in self.commute_minutes:
+            minutes = self.commute_minutes[max_commute["destination"]]
+            # NaN (destination not listed) compares False
+            within = minutes <= max_commute["minutes"]
+            spare = np.where(within, max_commute["minutes"] - minutes, 0.0)
+            scores += (within * (COMMUTE_WEIGHT + spare // COMMUTE_STEP_MINUTES)).astype(np.int32)
+
+        for word in [word for word in query_lower.split() if len(word) > 2]:
+            scores += self._ids_mask(("text", word), self.index.searchable.lookup(word))
+
+        return scores
+
+    def top_k(self, query_lower: str, conversation_context: Dict[str, Any], k: int) -> List[int]:
+        """Indices of the k best positive scores, ties broken by catalog order"""
+        scores = self.score_all(query_lower, conversation_context)
+        candidates = np.flatnonzero(scores > 0)
+        candidate_scores = scores[candidates]
+
+        if len(candidates) > k:
+            threshold = np.partition(candidate_scores, len(candidates) - k)[len(candidates) - k]
+            above = candidates[candidate_scores > threshold]
+            tied = candidates[candidate_scores == threshold][:k - len(above)]
+            candidates = np.concatenate([above, tied])
+            candidate_scores = scores[candidates]
+
+        order = np.lexsort((candidates, -candidate_scores))
+        return candidates[order][:k].tolist()
+
+    def clear_caches(self):
+        """Forget cached per-term masks; the shared PropertyIndex has its own clear_caches"""
+        with self._masks_lock:
+            self._masks.clear()
+
+    def _amenity_mask(self, amenity: str) -> np.ndarray:
+        bit = self._amenity_bit.get(amenity)
+        if bit is None:
+            return self._ids_mask(("amenity", amenity), self.index.amenities.lookup(amenity))
+        return ((self.amenity_bits >> np.uint64(bit)) & np.uint64(1)).astype(np.int32)
+
+    def _ids_mask(self, key, ids: FrozenSet[int]) -> np.ndarray:
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.zeros(self.size, dtype=bool)
+            mask[self._ids_array(ids)] = True
+            # Sessions score on several LLM executor threads at once
+            with self._masks_lock:
+                if len(self._masks) >= self._max_cached_masks:
+                    self._masks.clear()
+                self._masks.setdefault(key, mask)
+        return mask
+
+    @staticmethod
+    def _ids_array(ids: FrozenSet[int]) -> np.ndarray:
+        return np.fromiter(ids, dtype=np.int64, count=len(ids))
+
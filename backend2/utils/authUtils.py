@@ -1,23 +1,40 @@
-import json
-import os
 import hashlib
-from config import USERS_FILE
+import sqlite3
+from typing import Dict, List, Optional
+from utils.database import get_connection, transaction
 
 # Helper functions
-def load_users():
-    """Load users from JSON file"""
-    if not os.path.exists(USERS_FILE):
-        return {}
+def get_user_by_email(email: str) -> Optional[Dict]:
+    """Look up a user by email via the unique email index"""
+    row = get_connection().execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+    return dict(row) if row else None
+
+def find_existing_user(email: str, phone: str) -> Optional[str]:
+    """Return 'email' or 'phone' if either is already registered, else None"""
+    # An email match wins over another user's phone match, as the signup error reports the email first
+    row = get_connection().execute(
+        "SELECT email, phone FROM users WHERE email = ? OR phone = ? ORDER BY email = ? DESC LIMIT 1",
+        (email, phone, email),
+    ).fetchone()
+    if row is None:
+        return None
+    return "email" if row["email"] == email else "phone"
+
+def create_user(user: Dict) -> bool:
+    """Insert a new user; False if the email or phone was registered concurrently"""
     try:
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {}
+        with transaction() as conn:
+            conn.execute(
+                "INSERT INTO users (id, name, email, phone, password, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (user["id"], user["name"], user["email"], user["phone"], user["password"], user["created_at"]),
+            )
+        return True
+    except sqlite3.IntegrityError:
+        return False
 
-def save_users(users_data):
-    """Save users to JSON file"""
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users_data, f, indent=2)
+def list_users() -> List[Dict]:
+    """All registered users in registration order"""
+    return [dict(row) for row in get_connection().execute("SELECT * FROM users ORDER BY rowid")]
 
 def hash_password(password: str) -> str:
     """Hash password using SHA256"""
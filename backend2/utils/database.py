@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config import DATABASE_FILE, USERS_FILE
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT NOT NULL UNIQUE,
+    phone TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10.0, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Per-thread connection to DATABASE_FILE; creates the schema and migrates JSON data on first use"""
+    global _initialized
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect(DATABASE_FILE)
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                conn.executescript(SCHEMA)
+                migrate_users_json(conn)
+                _initialized = True
+    return conn
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """Run the block in one write transaction, committed on success and rolled back on error"""
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def migrate_users_json(conn: sqlite3.Connection, users_file: Optional[str] = USERS_FILE):
+    """One-shot import of the legacy users JSON file, recorded in the migrations table.
+
+    The check runs inside the write transaction, so workers starting together
+    import the file only once.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM migrations WHERE name = 'users_json'").fetchone():
+            conn.execute("ROLLBACK")
+            return
+        users = {}
+        if users_file and os.path.exists(users_file):
+            try:
+                with open(users_file, 'r') as f:
+                    users = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.error(f"Error reading {users_file}: {str(e)}")
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (id, name, email, phone, password, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(u["id"], u.get("name"), u["email"], u["phone"], u["password"], u.get("created_at", ""))
+             for u in users.values() if u.get("id") and u.get("email") and u.get("phone") and u.get("password")],
+        )
+        conn.execute("INSERT INTO migrations (name) VALUES ('users_json')")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    logger.info(f"Migrated {len(users)} users from {users_file} into {DATABASE_FILE}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    get_connection()
@@ -1,5 +1,10 @@
-def get_prompt(user_query, property_context, memory_context, total_properties, locations):
-    prompt = f"""
+def get_prompt_prefix(total_properties, locations):
+    """Instructions shared by every turn; they depend only on the catalog, so render them once per catalog version.
+
+    The text is identical from turn to turn and always leads the prompt, so it
+    can be reused by provider-side prefix caching.
+    """
+    prefix = f"""
 You are an intelligent AI property assistant specialized in Mangalore real estate. You have memory of our conversation and understand user preferences.
 
 CORE INSTRUCTIONS:
@@ -23,13 +28,6 @@ RESPONSE STRUCTURE:
 6. Three personalized follow-up questions that user can ask 
 7. If the user replies with "1", "2", or "3", respond only to the corresponding follow-up question that was generated earlier.
 
-MEMORY & CONTEXT:
-{memory_context}
-
-CURRENT QUERY: {user_query}
-
-RELEVANT PROPERTIES: {property_context}
-
 RESPONSE GUIDELINES:
 - If they ask about location/commute: Focus heavily on Commute Times and Nearby Locations
 - If they mention budget: Include pricing information
@@ -56,7 +54,26 @@ Ask me anything specific! 🏡
 Remember: Be intelligent, contextual, and helpful. Go beyond just listing properties—understand what the user really wants.
 """
     
-    return prompt
+    return prefix
+
+
+def get_turn_prompt(user_query, property_context, memory_context):
+    """The per-turn sections that follow the shared prefix"""
+    return f"""
+MEMORY & CONTEXT:
+{memory_context}
+
+CURRENT QUERY: {user_query}
+
+RELEVANT PROPERTIES: {property_context}
+"""
+
+
+def get_prompt(user_query, property_context, memory_context, total_properties, locations, prefix=None):
+    """Full prompt for one turn; pass a prefix rendered by get_prompt_prefix to skip re-rendering it"""
+    if prefix is None:
+        prefix = get_prompt_prefix(total_properties, locations)
+    return prefix + get_turn_prompt(user_query, property_context, memory_context)
 
 
 
@@ -7,4 +7,50 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GOOGLE_MAPS_API_KEY=os.getenv("GOOGLE_MAPS_API_KEY")
 USERS_FILE = os.getenv("USERS_FILE")
 APARTMENT_DATA = os.getenv("APARTMENT_DATA")
-SCHEDULE_DATA = os.getenv("SCHEDULE_DATA")
\ No newline at end of file
+SCHEDULE_DATA = os.getenv("SCHEDULE_DATA")
+
+# Chat exchanges sent verbatim each turn; older ones are folded into a running summary
+CHAT_MEMORY_RECENT_TURNS = int(os.getenv("CHAT_MEMORY_RECENT_TURNS", "3"))
+# Approximate token budget for the per-turn property context sent to Gemini
+PROPERTY_CONTEXT_TOKEN_BUDGET = int(os.getenv("PROPERTY_CONTEXT_TOKEN_BUDGET", "1500"))
+# Upper bound on buildings retrieved for a single turn
+PROPERTY_CONTEXT_MAX_PROPERTIES = int(os.getenv("PROPERTY_CONTEXT_MAX_PROPERTIES", "6"))
+# Maximum Gemini calls in flight at once; further chat turns queue for a worker
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Cached replies for context-free chat turns (e.g. opening queries)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+# Chat sessions idle for longer than this are evicted
+SESSION_IDLE_TTL_SECONDS = int(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+# Least recently used sessions are evicted beyond this count
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
+# Least recently used sessions are evicted once their estimated memory passes this
+SESSION_MEMORY_HIGH_WATER_MB = float(os.getenv("SESSION_MEMORY_HIGH_WATER_MB", "256"))
+# How often the background sweeper looks for idle sessions
+SESSION_SWEEP_INTERVAL_SECONDS = int(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))
+# Where chat session state lives: "memory" (single worker), "sqlite" (workers on one host) or "redis"
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "sessions.db")
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+# SQLite database holding users and appointments
+DATABASE_FILE = os.getenv("DATABASE_FILE", "database/app.db")
+# Appointment storage: "sqlite" (DATABASE_FILE) or "journal" (SCHEDULE_DATA snapshot plus an append-only journal)
+SCHEDULE_BACKEND = os.getenv("SCHEDULE_BACKEND", "sqlite")
+# The journal is folded into the snapshot once it holds this many entries
+SCHEDULE_JOURNAL_COMPACT_ENTRIES = int(os.getenv("SCHEDULE_JOURNAL_COMPACT_ENTRIES", "1000"))
+# How often the background compactor checks the journal size
+SCHEDULE_JOURNAL_COMPACT_INTERVAL_SECONDS = int(os.getenv("SCHEDULE_JOURNAL_COMPACT_INTERVAL_SECONDS", "60"))
+# Google Places nearby lookups: (connect, read) timeouts and the persistent result cache
+PLACES_CONNECT_TIMEOUT_SECONDS = float(os.getenv("PLACES_CONNECT_TIMEOUT_SECONDS", "3.05"))
+PLACES_READ_TIMEOUT_SECONDS = float(os.getenv("PLACES_READ_TIMEOUT_SECONDS", "10"))
+PLACES_CACHE_FILE = os.getenv("PLACES_CACHE_FILE", "database/places_cache.db")
+# Cached results are fresh for this long, then served stale while one background refresh runs
+PLACES_CACHE_TTL_SECONDS = int(os.getenv("PLACES_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+PLACES_CACHE_STALE_SECONDS = int(os.getenv("PLACES_CACHE_STALE_SECONDS", str(30 * 24 * 3600)))
+# Batch precompute of nearby places for every building: worker threads and upstream calls per second
+PLACES_PRECOMPUTE_WORKERS = int(os.getenv("PLACES_PRECOMPUTE_WORKERS", "4"))
+PLACES_PRECOMPUTE_RATE_PER_SECOND = float(os.getenv("PLACES_PRECOMPUTE_RATE_PER_SECOND", "5"))
+# Refresh buildings with new or moved coordinates in the background after an upload
+PLACES_PRECOMPUTE_ON_UPLOAD = os.getenv("PLACES_PRECOMPUTE_ON_UPLOAD", "true").lower() == "true"
+# A building counts as "near" a place type (airport, school, ...) when a cached place of that type is this close
+GEO_NEAR_RADIUS_KM = float(os.getenv("GEO_NEAR_RADIUS_KM", "2"))
@@ -1,13 +1,12 @@
 import io
-import os
 import logging
 import json
-from pathlib import Path
 import pandas as pd
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from core.config import USERS_FILE, APARTMENT_DATA, SCHEDULE_DATA
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from core.config import APARTMENT_DATA
 from routers.property import load_property_bot
-from datetime import datetime
+from services.schedule_service import DEFAULT_PAGE_SIZE, appointment_store
 
 
 logger = logging.getLogger(__name__)
@@ -19,17 +18,26 @@ router = APIRouter(
 )
 
 @router.get("/schedules")
-def list_users():
-    file_path = Path(SCHEDULE_DATA)
-
-    if not file_path.exists():
-        return {"message": "Schedule file not found.", "users": []}
-
-    with open(file_path, "r") as file:
-        data = json.load(file)
+def list_users(
+    status: Optional[str] = None,
+    phone: Optional[str] = None,
+    date_from: Optional[str] = Query(None, description="Earliest appointment date, YYYY-MM-DD"),
+    date_to: Optional[str] = Query(None, description="Latest appointment date, YYYY-MM-DD"),
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=500),
+):
+    """List appointments by date and time, one page at a time"""
+    try:
+        appointments, next_cursor, total = appointment_store.query(
+            status=status, phone=phone, date_from=date_from, date_to=date_to,
+            descending=order == "desc", cursor=cursor, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     users = []
-    for user in data.values():
+    for user in appointments:
         users.append({
             "id": user.get("id"),
             "name": user.get("name"),
@@ -37,51 +45,30 @@ def list_users():
             "date": user.get("date"),
             "time": user.get("time"),
             "message": user.get("message"),
+            "status": user.get("status"),
         })
             
-    return {"users": users}
+    return {"users": users, "total": total, "next_cursor": next_cursor}
 
 @router.put("/schedules/{appointment_id}")
 def update_appointment_status(appointment_id: str, appointment_data: dict):
-    if not os.path.exists(SCHEDULE_DATA):
-        raise HTTPException(status_code=404, detail="No appointments found.")
-
-    with open(SCHEDULE_DATA, 'r') as f:
-        data = json.load(f)
-
-    if appointment_id not in data:
+    appointment = appointment_store.update(appointment_id, appointment_data)
+    if appointment is None:
         raise HTTPException(status_code=404, detail="Appointment not found.")
 
-    # Update fields
-    data[appointment_id].update(appointment_data)
-    data[appointment_id]['updated_at'] = datetime.now().isoformat()
-
-    with open(SCHEDULE_DATA, 'w') as f:
-        json.dump(data, f, indent=4)
-
     return {
         "success": True,
         "message": "Appointment updated successfully.",
-        "appointment": data[appointment_id]
+        "appointment": appointment
     }
     
 
 @router.delete("/schedules/{appointment_id}")
 def delete_appointment(appointment_id: str):
-    if not os.path.exists(SCHEDULE_DATA):
-        raise HTTPException(status_code=404, detail="No appointments found.")
-
-    with open(SCHEDULE_DATA, 'r') as f:
-        data = json.load(f)
-
-    if appointment_id not in data:
+    deleted_appointment = appointment_store.delete(appointment_id)
+    if deleted_appointment is None:
         raise HTTPException(status_code=404, detail="Appointment not found.")
 
-    deleted_appointment = data.pop(appointment_id)
-
-    with open(SCHEDULE_DATA, 'w') as f:
-        json.dump(data, f, indent=4)
-
     return {
         "success": True,
         "message": "Appointment deleted successfully.",
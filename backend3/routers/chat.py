@@ -1,8 +1,13 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+import json
 import logging
 from schemas.chat_schema import ChatRequest, ChatResponse
 from services.chatbot_service import Chatbot_Service
+from services.session_manager import SessionManager
+from services.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +16,7 @@ router = APIRouter(
     tags=["chat"],
     responses={404: {"description": "Not found"}},
 )
-sessions = {}
+sessions = SessionManager(Chatbot_Service)
 
 @router.post("/", response_model=ChatResponse)
 async def chat(request: ChatRequest):
@@ -19,11 +24,11 @@ async def chat(request: ChatRequest):
     try:
         session_id = request.session_id 
         
-        if session_id not in sessions:
-            raise HTTPException(status_code=404, detail="Invalid session ID")
-        
-        session_chatbot = sessions[session_id]
-        response, suggestions = session_chatbot.get_ai_response(request.query)
+        async with sessions.checkout(session_id) as session_chatbot:
+            if session_chatbot is None:
+                raise HTTPException(status_code=404, detail="Invalid session ID")
+
+            response, suggestions = await session_chatbot.get_ai_response_async(request.query)
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         return ChatResponse(
@@ -36,13 +41,47 @@ async def chat(request: ChatRequest):
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream the chat response as Server-Sent Events.
+
+    Emits `token` events with text chunks as they are generated, then a
+    `done` event carrying the same metadata as /chat, or an `error` event.
+    """
+    session_id = request.session_id
+
+    if not await run_in_threadpool(sessions.exists, session_id):
+        raise HTTPException(status_code=404, detail="Invalid session ID")
+
+    async def event_stream():
+        try:
+            async with sessions.checkout(session_id) as session_chatbot:
+                if session_chatbot is None:
+                    raise ValueError("Invalid session ID")
+                async for text in session_chatbot.stream_ai_response_async(request.query):
+                    yield _sse("token", {"text": text})
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            yield _sse("done", {"suggestions": [], "session_id": session_id, "timestamp": timestamp})
+        except Exception as e:
+            logger.error(f"Error in chat stream: {str(e)}")
+            yield _sse("error", {"detail": f"Chat error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
     
 @router.get("/create_session")
 async def create_session():
     """Create a new chat session"""
     try:
-        session_id = f"session_{datetime.now().timestamp()}"
-        sessions[session_id] = Chatbot_Service()
+        session_id = await run_in_threadpool(sessions.create)
         return {"session_id": session_id, "message": "Session created successfully"}
     except Exception as e:
         logger.error(f"Error creating session: {str(e)}")
@@ -52,8 +91,7 @@ async def create_session():
 async def clear_session(session_id: str):
 
     try:
-        if session_id in sessions:
-            del sessions[session_id]
+        if await run_in_threadpool(sessions.delete, session_id):
             return {"message": f"Session {session_id} cleared successfully"}
         else:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -64,11 +102,19 @@ async def clear_session(session_id: str):
 @router.get("/sessions")
 async def get_active_sessions():
     try:
-        active_sessions = list(sessions.keys())
         return {
-            "active_sessions": active_sessions,
-            "total_sessions": len(active_sessions)
+            "active_sessions": await run_in_threadpool(sessions.ids),
+            **(await run_in_threadpool(sessions.stats))
         }
     except Exception as e:
         logger.error(f"Error getting sessions: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Sessions error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Sessions error: {str(e)}")
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Response cache size and hit/miss counters"""
+    try:
+        return response_cache.stats()
+    except Exception as e:
+        logger.error(f"Error getting cache stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Cache stats error: {str(e)}")
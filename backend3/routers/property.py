@@ -1,8 +1,15 @@
-import math
 import logging
+from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from services.chatbot_service import Chatbot_Service
+from core.config import PLACES_PRECOMPUTE_ON_UPLOAD
+from services.catalog_service import reload_catalog
+from services.geo_index import building_coordinates, get_poi_index
+from services.places_precompute import schedule_precompute
+from services.response_cache import response_cache
+from services.listing_service import clear_listing, encode_json, get_listing, matches_etag
 from schemas.property_schema import PropertyDetailsRequest, PropertyDetailsResponse, PropertyDeitail
 
 logger = logging.getLogger(__name__)
@@ -13,12 +20,14 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-chatbot = None
+chatbot = Chatbot_Service()
 def load_property_bot():
-    global chatbot
-    chatbot = Chatbot_Service()
-
-load_property_bot()
+    """Reload the shared property catalog; every session picks it up on its next turn"""
+    catalog = reload_catalog()
+    response_cache.clear()
+    clear_listing()
+    if PLACES_PRECOMPUTE_ON_UPLOAD:
+        schedule_precompute(catalog.properties)
 
 @router.post("/details", response_model=PropertyDetailsResponse)
 async def get_property_details(request: PropertyDetailsRequest):
@@ -31,40 +40,75 @@ async def get_property_details(request: PropertyDetailsRequest):
         raise HTTPException(status_code=500, detail=f"Property details error: {str(e)}")
 
 @router.get("/list_properties")
-async def get_properties():
-    """Get all properties with coordinates for map display"""
+async def get_properties(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated property columns to return"),
+    view: Literal["full", "map", "list"] = Query("full", description="full, map (markers only) or list (properties only)"),
+    location: Optional[str] = None,
+    bhk: Optional[int] = None,
+    min_price: Optional[float] = Query(None, description="Lakhs"),
+    max_price: Optional[float] = Query(None, description="Lakhs"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+):
+    """Get properties with coordinates for map display, optionally projected, filtered and paginated"""
+    listing = get_listing(chatbot.catalog)
+    query_string = str(request.query_params)
+    etag = listing.query_etag(query_string) if query_string else listing.etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
 
-    properties_with_coords = []
-    clean_properties = []
+    if matches_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
 
-    for prop in chatbot.properties_data:
-        # Sanitize individual property
-        sanitized_prop = {
-            k: (None if isinstance(v, float) and (math.isnan(v) or math.isinf(v)) else v)
-            for k, v in prop.items()
-        }
-        clean_properties.append(sanitized_prop)
+    if not query_string:
+        return Response(content=listing.body, media_type="application/json", headers=headers)
+
+    payload = listing.query(
+        fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        view=view, location=location, bhk=bhk, min_price=min_price, max_price=max_price,
+        offset=offset, limit=limit,
+    )
+    return Response(content=encode_json(payload), media_type="application/json", headers=headers)
+
+@router.get("/near")
+async def properties_near(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    landmark: Optional[str] = Query(None, description="Cached place or building name to measure from instead of lat/lng"),
+    radius_km: Optional[float] = Query(None, gt=0, description="Only buildings within this distance"),
+    limit: int = Query(10, ge=1, le=500),
+):
+    """Buildings nearest to a point or landmark, closest first"""
+    catalog = chatbot.catalog
+    origin = {"lat": lat, "lng": lng}
+    if landmark:
+        place = get_poi_index().find(landmark)
+        if place:
+            origin = {"name": place["name"], "lat": place["lat"], "lng": place["lng"]}
+        else:
+            building = catalog.find_by_name(landmark)
+            coordinates = building_coordinates(building) if building else None
+            if not coordinates:
+                raise HTTPException(status_code=404, detail=f"Landmark '{landmark}' not found")
+            origin = {"name": building.get("Building Name"), "lat": coordinates[0], "lng": coordinates[1]}
+    elif lat is None or lng is None:
+        raise HTTPException(status_code=400, detail="Provide lat and lng, or a landmark")
 
-        if sanitized_prop.get('Latitude') and sanitized_prop.get('Longitude'):
-            properties_with_coords.append({
-                'id': len(properties_with_coords) + 1,
-                'name': sanitized_prop.get('Building Name'),
-                'location': sanitized_prop.get('Location'),
-                'lat': sanitized_prop.get('Latitude'),
-                'lng': sanitized_prop.get('Longitude'),
-                'price': sanitized_prop.get('Price Range (Lakhs)'),
-                'types': sanitized_prop.get('Apartment Types'),
-                'amenities': sanitized_prop.get('Amenities'),
-                'contact': sanitized_prop.get('Builder Contact'),
-                'builder': sanitized_prop.get('Builder Name'),
-                'status': sanitized_prop.get('Availability Status')
-            })
+    if radius_km:
+        found = catalog.geo.within(origin["lat"], origin["lng"], radius_km)[:limit]
+    else:
+        found = catalog.geo.nearest(origin["lat"], origin["lng"], limit)
 
-    return {
-        "properties": clean_properties,
-        "map_properties": properties_with_coords,
-        "count": len(properties_with_coords)
-    }
+    properties = []
+    for distance, i in found:
+        prop = catalog.properties[i]
+        properties.append({
+            "name": prop.get("Building Name"),
+            "location": prop.get("Location"),
+            "coordinates": {"lat": prop.get("Latitude"), "lng": prop.get("Longitude")},
+            "distance_km": round(distance, 3),
+        })
+    return {"origin": origin, "properties": properties}
 
 @router.post('/nearby')
 async def find_nearby(request: PropertyDeitail):
@@ -74,11 +118,7 @@ async def find_nearby(request: PropertyDeitail):
         place_type = request.place_type
 
         # Find the property
-        target_property = None
-        for prop in chatbot.properties_data:
-            if property_name.lower() in prop.get('Building Name', '').lower():
-                target_property = prop
-                break
+        target_property = chatbot.catalog.find_by_name(property_name)
         
         if not target_property:
             raise HTTPException(
@@ -96,7 +136,7 @@ async def find_nearby(request: PropertyDeitail):
             )
         
         # Find nearby places
-        nearby_result = chatbot.find_nearby_places(lat, lng, place_type)
+        nearby_result = await run_in_threadpool(chatbot.find_nearby_places, lat, lng, place_type)
         
         logger.info(f"Found {len(nearby_result)} nearby places for {property_name} ({place_type})")
         return {
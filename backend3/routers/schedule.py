@@ -2,30 +2,19 @@ from fastapi import APIRouter, Body
 from fastapi.responses import JSONResponse
 from schemas.schedule_schema import ScheduleSchema
 from schemas.schedule_schema import ScheduleResponseSchema
-import logging, uuid, os, json
+import logging, uuid
 from datetime import datetime
-from core.config import SCHEDULE_DATA
+from services.schedule_service import appointment_store
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/schedule", tags=["schedule"])
 
-SCHEDULE_FILE = SCHEDULE_DATA
-
 def generate_appointment_id():
     return str(uuid.uuid4())
 
 def save_appointment_to_file(appointment):
-    if os.path.exists(SCHEDULE_FILE):
-        with open(SCHEDULE_FILE, 'r') as f:
-            data = json.load(f)
-    else:
-        data = {}
-
-    # Save appointment using its ID as key
-    data[appointment['id']] = appointment
-
-    with open(SCHEDULE_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    """Persist a new appointment in the appointment store"""
+    appointment_store.create(appointment)
 
 @router.post('/', response_model=ScheduleResponseSchema)
 async def schedule_appointment(request_model: ScheduleSchema = Body(...)):
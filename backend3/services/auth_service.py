@@ -1,36 +1,23 @@
-import json
-import os
-from core.config import USERS_FILE
-import json
-import os
 import uuid
 from datetime import datetime
 
-def load_users():
-    if not os.path.exists(USERS_FILE):
-        return {}
-    with open(USERS_FILE, "r") as f:
-        return json.load(f)
+from services.database_service import get_connection, transaction
 
-def save_users(users):
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f, indent=2)
+
+def get_user_by_phone(phone):
+    row = get_connection().execute("SELECT id, phone, created_at FROM users WHERE phone = ?", (phone,)).fetchone()
+    return dict(row) if row else None
 
 def create_user_if_not_exist(phone):
-    users = load_users()
-    
-    # Check if user exists by phone
-    for user in users.values():
-        if user["phone"] == phone:
-            return user  # Existing user
+    user = get_user_by_phone(phone)
+    if user:
+        return user  # Existing user
 
-    # If not found, create a new user
-    new_id = str(uuid.uuid4())
-    new_user = {
-        "id": new_id,
-        "phone": phone,
-        "created_at": datetime.utcnow().isoformat()
-    }
-    users[new_id] = new_user
-    save_users(users)
-    return new_user
+    # If not found, create a new user; the unique phone index keeps concurrent logins to one row
+    with transaction() as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO users (id, phone, created_at) VALUES (?, ?, ?)",
+            (str(uuid.uuid4()), phone, datetime.utcnow().isoformat()),
+        )
+        row = conn.execute("SELECT id, phone, created_at FROM users WHERE phone = ?", (phone,)).fetchone()
+    return dict(row)
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from core.config import APARTMENT_DATA
+from services.geo_index import GeoIndex, building_coordinates
+from services.property_columns import PropertyColumns
+from services.retrieval_service import PropertyRetriever
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROPERTIES_FILE = APARTMENT_DATA or "apartments.json"
+
+
+class PropertyCatalog:
+    """Read-only snapshot of the property data, shared by reference across all chat sessions"""
+
+    def __init__(self, properties: List[Dict], version: str, source: Optional[str] = None):
+        self.properties: Tuple[Dict, ...] = tuple(properties)
+        self.version = version
+        self.source = source
+        self.loaded_at = datetime.now().isoformat()
+        # Ordered de-duplication keeps the location list stable between renders
+        self.locations: List[str] = list(dict.fromkeys(
+            prop['Location'] for prop in self.properties if prop.get('Location')
+        ))
+        # Prices, BHK types and sizes parsed once into typed columns
+        self.columns = PropertyColumns(self.properties)
+        # Building coordinates for radius and nearest-N queries; row i is properties[i]
+        self.geo = GeoIndex([building_coordinates(prop) for prop in self.properties])
+        self.retriever = PropertyRetriever(self.properties, self.columns, self.geo)
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def find_by_name(self, property_name: str) -> Optional[Dict]:
+        """Return the first property whose building name contains property_name"""
+        name_lower = property_name.lower()
+        for prop in self.properties:
+            if name_lower in prop.get("Building Name", "").lower():
+                return prop
+        return None
+
+
+_catalog: Optional[PropertyCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def load_catalog(properties_file: str = DEFAULT_PROPERTIES_FILE) -> PropertyCatalog:
+    """Load properties from JSON file into a new catalog snapshot"""
+    try:
+        if os.path.exists(properties_file):
+            with open(properties_file, 'rb') as file:
+                raw = file.read()
+            properties = json.loads(raw.decode('utf-8'))
+            version = hashlib.sha256(raw).hexdigest()[:12]
+        else:
+            logger.error(f"Properties file '{properties_file}' not found!")
+            properties, version = [], "empty"
+    except Exception as e:
+        logger.error(f"Error loading properties: {str(e)}")
+        properties, version = [], "empty"
+
+    catalog = PropertyCatalog(properties, version, source=properties_file)
+    logger.info(f"Loaded property catalog {catalog.version} with {len(catalog)} properties")
+    return catalog
+
+
+def get_catalog() -> PropertyCatalog:
+    """Return the process-wide catalog, loading it on first use"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
+
+
+def reload_catalog(properties_file: str = DEFAULT_PROPERTIES_FILE) -> PropertyCatalog:
+    """Re-read the properties file and atomically swap in the new catalog"""
+    global _catalog
+    catalog = load_catalog(properties_file)
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
@@ -1,189 +1,316 @@
+import asyncio
 import logging
-import os
-import json
-import requests
+import threading
 import google.generativeai as genai
 
-from typing import List, Dict, Tuple
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 # Assuming these imports exist and work as intended in your project
 from utils.prompt import get_prompt, get_greeting
-from core.config import GEMINI_API_KEY, GOOGLE_MAPS_API_KEY
+from core.config import (
+    GEMINI_API_KEY, PROPERTY_CONTEXT_TOKEN_BUDGET, PROPERTY_CONTEXT_MAX_PROPERTIES, CHAT_MEMORY_RECENT_TURNS,
+)
+from services.catalog_service import PropertyCatalog, get_catalog
+from services.conversation_summary import ConversationSummary, get_catalog_matcher
+from services.retrieval_service import extract_preferences
+from services.places_service import get_places_service
+from services.llm_executor import run_blocking, stream_blocking
+from services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_model_lock = threading.Lock()
+_system_prompts: Dict[str, Dict[str, List[str]]] = {}
+
+# Streamed replies are held back until this many characters rule out the GREETING marker
+GREETING_HOLD_CHARS = 16
+
+
+def get_model(api_key: str = None):
+    """Configure Gemini once per process and return the shared model"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                if not api_key:
+                    api_key = GEMINI_API_KEY
+
+                if not api_key:
+                    raise Exception("API key not found. Please set GEMINI_API_KEY in your .env file.")
+
+                genai.configure(api_key=api_key)
+                _model = genai.GenerativeModel("gemini-2.0-flash")
+                logger.info("Gemini API configured successfully (without tools)!")
+    return _model
+
+
+def get_system_prompt(catalog: PropertyCatalog) -> Dict[str, List[str]]:
+    """Render the system prompt once per catalog version"""
+    system_prompt = _system_prompts.get(catalog.version)
+    if system_prompt is None:
+        system_prompt = {"role": "user", "parts": [get_prompt(len(catalog), catalog.locations)]}
+        # Only the current catalog version is ever needed again
+        _system_prompts.clear()
+        _system_prompts[catalog.version] = system_prompt
+    return system_prompt
+
 
 class Chatbot_Service:
-    def __init__(self, properties_file="apartments.json"):
-        self.logger = logging.getLogger(__name__)
-        logging.basicConfig(level=logging.INFO)
+    def __init__(self, catalog: Optional[PropertyCatalog] = None):
+        self.logger = logger
 
-        self.properties_file = properties_file
-        self.properties_data = self.load_properties()
+        # Pinned catalog, or None to always follow the process-wide catalog
+        self._catalog = catalog
 
         self.configure_gemini()
 
         # Initialize chat_memory as a list of dictionaries, each with 'role' and 'parts'
         self.chat_memory: List[Dict[str, str]] = []
+        # Preferences stated so far and the buildings last shown, used for retrieval
+        self.user_preferences: Dict = {}
+        self.recent_properties: List[str] = []
+        # Turns that have left chat_memory, folded into a bounded summary
+        self.summary = ConversationSummary()
+        # Serializes turns of this session; other sessions run concurrently
+        self._turn_lock = asyncio.Lock()
         self.init_history()
 
         # Create a chat session with the model for continuous conversation
         # The history will be managed manually before sending messages to ensure the 4-turn limit
         self.chat_session = self.model.start_chat(history=self.chat_memory)
 
+    def to_state(self) -> Dict[str, Any]:
+        """Serializable conversation state, restored by from_state"""
+        return {
+            "chat_memory": self.chat_memory,
+            "user_preferences": self.user_preferences,
+            "recent_properties": self.recent_properties,
+            "summary": self.summary.to_state(),
+        }
 
-    def load_properties(self) -> List[Dict]:
-        """Load properties from JSON file"""
-        try:
-            if os.path.exists(self.properties_file):
-                with open(self.properties_file, 'r', encoding='utf-8') as file:
-                    return json.load(file)
-            else:
-                self.logger.error(f"Properties file '{self.properties_file}' not found!")
-                return []
-        except Exception as e:
-            self.logger.error(f"Error loading properties: {str(e)}")
-            return []
-
-    def configure_gemini(self, api_key: str = None):
-        """Configure Gemini API and register tools (if any)"""
-        try:
-            if not api_key:
-                api_key = GEMINI_API_KEY
-
-            if not api_key:
-                raise Exception("API key not found. Please set GEMINI_API_KEY in your .env file.")
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], catalog: Optional[PropertyCatalog] = None) -> "Chatbot_Service":
+        """Rebuild a session from to_state output"""
+        chatbot = cls(catalog)
+        chatbot.chat_memory = state.get("chat_memory", [])
+        chatbot.user_preferences = state.get("user_preferences", {})
+        chatbot.recent_properties = state.get("recent_properties", [])
+        chatbot.summary = ConversationSummary(state.get("summary"))
+        return chatbot
 
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel("gemini-2.0-flash")
+    @property
+    def catalog(self) -> PropertyCatalog:
+        return self._catalog or get_catalog()
 
-            self.logger.info("Gemini API configured successfully (without tools)!")
+    @property
+    def properties_data(self) -> Tuple[Dict, ...]:
+        return self.catalog.properties
 
+    def configure_gemini(self, api_key: str = None):
+        """Attach the shared Gemini model to this session"""
+        try:
+            self.model = get_model(api_key)
         except Exception as e:
             self.logger.error(f"Error configuring Gemini API: {str(e)}")
             raise e
         
     def init_history(self):
-        """Initializes the chat history with the system prompt, not added to chat_memory directly."""
-        prompt = self.get_enhanced_prompt()
-        self._initial_system_prompt = {"role": "user", "parts": [prompt]}
+        """Initializes the model acknowledgement; the system prompt is shared per catalog version."""
         self._initial_model_response = {"role": "model", "parts": ["Ok. I am your property bot, ask me questions."]}
 
+    @property
+    def _initial_system_prompt(self) -> Dict[str, List[str]]:
+        return get_system_prompt(self.catalog)
+
+    def build_property_context(self, user_query: str) -> str:
+        """Retrieve the buildings and fields relevant to this turn within the token budget"""
+        catalog = self.catalog
+        extract_preferences(user_query, self.user_preferences, catalog.locations, catalog.columns.commute_destinations)
+        context, names = catalog.retriever.build_context(
+            user_query,
+            self.user_preferences,
+            self.recent_properties,
+            token_budget=PROPERTY_CONTEXT_TOKEN_BUDGET,
+            limit=PROPERTY_CONTEXT_MAX_PROPERTIES,
+        )
+        if names:
+            self.recent_properties = names[:4]
+        return context
+
+    def fold_old_turns(self):
+        """Fold turns beyond the recent window into the running summary, once each"""
+        overflow = len(self.chat_memory) - 2 * CHAT_MEMORY_RECENT_TURNS
+        if overflow <= 0:
+            return
+        # Messages come in user/model pairs, so whole turns are folded
+        overflow += overflow % 2
+        matcher = get_catalog_matcher(self.catalog)
+        old_turns = self.chat_memory[:overflow]
+        for user_message, model_message in zip(old_turns[::2], old_turns[1::2]):
+            self.summary.fold(user_message["parts"][0], model_message["parts"][0], matcher)
+        del self.chat_memory[:overflow]
+
+    def _prepare_turn(self, user_query: str) -> str:
+        """Reset the chat history to the bounded memory and build this turn's message"""
+        # Sessions saved before the summary existed may still hold a longer history
+        self.fold_old_turns()
+
+        current_history = [self._initial_system_prompt, self._initial_model_response] + self.chat_memory
+        self.chat_session.history = current_history
+
+        property_context = self.build_property_context(user_query)
+        message = f"PROPERTY DATA:\n{property_context}\n\nUSER QUERY: {user_query}"
+        if self.summary:
+            message = f"CONVERSATION SUMMARY:\n{self.summary.render(self.user_preferences)}\n\n{message}"
+        return message
+
+    def _is_context_free(self) -> bool:
+        """True when no earlier turn can influence the reply, so it may be cached"""
+        return (not self.chat_memory and not self.summary
+                and not self.user_preferences and not self.recent_properties)
+
+    def _cache_key(self, user_query: str):
+        return response_cache.make_key(self.catalog.version, user_query, self.user_preferences)
+
+    def _answer_from_cache(self, user_query: str, cached: Tuple[str, bool]) -> str:
+        ai_response, remember = cached
+        if remember:
+            self._finish_turn(user_query, ai_response)
+        return ai_response
+
+    def _finish_turn(self, user_query: str, ai_response: str):
+        self.chat_memory.append({"role": "user", "parts": [user_query]})
+        self.chat_memory.append({"role": "model", "parts": [ai_response]})
+        self.fold_old_turns()
+
     def get_ai_response(self, user_query: str) -> Tuple[str, List[str]]:
         """
-        Gets an AI response, maintaining conversation history with a limit of 4 turns.
-        The initial greeting is not counted in the 4 turns.
+        Gets an AI response, keeping the last CHAT_MEMORY_RECENT_TURNS turns verbatim
+        and older ones in the running summary sent with the current message.
+        The initial greeting is not counted in these turns.
+        Only the retrieved property context travels with the current message;
+        history keeps the raw user queries.
+        Context-free turns are answered from the shared response cache when possible.
         """
         try:
-            self.chat_memory.append({"role": "user", "parts": [user_query]})
-
-            print(len(self.chat_memory))
-            if len(self.chat_memory) > 8: 
-                self.chat_memory = self.chat_memory[-8:]
+            cacheable = self._is_context_free()
+            message = self._prepare_turn(user_query)
+            cache_key = self._cache_key(user_query) if cacheable else None
+            cached = response_cache.get(cache_key) if cache_key else None
+            if cached:
+                return self._answer_from_cache(user_query, cached), []
 
-            current_history = [self._initial_system_prompt, self._initial_model_response] + self.chat_memory
-            self.chat_session.history = current_history
-            
-            response = self.chat_session.send_message(user_query)
+            response = self.chat_session.send_message(message)
             ai_response = response.text.strip()
 
             if "GREETING" in ai_response:
-                total_properties = len(self.properties_data)
-                locations = list(set(prop['Location'] for prop in self.properties_data))
-                return get_greeting(total_properties, locations), []
+                catalog = self.catalog
+                greeting = get_greeting(len(catalog), catalog.locations)
+                if cache_key:
+                    response_cache.put(cache_key, (greeting, False))
+                return greeting, []
 
-            self.chat_memory.append({"role": "model", "parts": [ai_response]})
+            self._finish_turn(user_query, ai_response)
+            if cache_key:
+                response_cache.put(cache_key, (ai_response, True))
             return ai_response, []
         except Exception as e:
             self.logger.error(f"Error getting AI response: {str(e)}")
             error_response = f"Sorry, I encountered an error: {str(e)}. Please try a simpler question."
             return error_response, []
 
+    async def get_ai_response_async(self, user_query: str) -> Tuple[str, List[str]]:
+        """Run get_ai_response on the LLM executor without blocking the event loop"""
+        async with self._turn_lock:
+            return await run_blocking(self.get_ai_response, user_query)
+
+    def stream_ai_response(self, user_query: str) -> Iterator[str]:
+        """
+        Yields the AI response in chunks as Gemini generates them.
+        The opening characters are held back until they rule out the GREETING
+        marker, so greetings are still answered with the canned greeting.
+        The turn is added to the chat memory, and older turns folded into the
+        summary, only after the last chunk has been yielded.
+        """
+        cacheable = self._is_context_free()
+        message = self._prepare_turn(user_query)
+        cache_key = self._cache_key(user_query) if cacheable else None
+        cached = response_cache.get(cache_key) if cache_key else None
+        if cached:
+            yield self._answer_from_cache(user_query, cached)
+            return
+
+        response = self.chat_session.send_message(message, stream=True)
+
+        parts = []
+        held = ""
+        for chunk in response:
+            text = chunk.text
+            if not text:
+                continue
+            parts.append(text)
+            if held is None:
+                yield text
+                continue
+            held += text
+            if "GREETING" in held:
+                catalog = self.catalog
+                greeting = get_greeting(len(catalog), catalog.locations)
+                if cache_key:
+                    response_cache.put(cache_key, (greeting, False))
+                yield greeting
+                return
+            if len(held.lstrip()) >= GREETING_HOLD_CHARS:
+                yield held.lstrip()
+                held = None
+
+        if held is not None:
+            if not held.strip():
+                return
+            yield held.strip()
+        ai_response = "".join(parts).strip()
+        self._finish_turn(user_query, ai_response)
+        if cache_key:
+            response_cache.put(cache_key, (ai_response, True))
+
+    async def stream_ai_response_async(self, user_query: str) -> AsyncIterator[str]:
+        """Stream the AI response from the LLM executor without blocking the event loop"""
+        async with self._turn_lock:
+            async for text in stream_blocking(self.stream_ai_response, user_query):
+                yield text
+
     def get_property_details(self, property_name: str) -> str:
         """Get detailed information about a specific property"""
-        for prop in self.properties_data:
-            if property_name.lower() in prop.get("Building Name", "").lower():
-                details = f"""
-                    {prop['Building Name']}
-
-                    📍 Location: {prop['Location']}, {prop['Street Name']}
-                    🏢 Types: {prop['Apartment Types']}
-                    📐 Sizes: {prop['Apartment Sizes']}
-                    💰 Price: ₹{prop['Price Range (Lakhs)']} lakhs
-                    🎯 Status: {prop['Availability Status']}
-                    🏗️ Builder: {prop['Builder Name']}
-                    📞 Contact: {prop['Builder Contact']}
-
-                    🏊 Amenities:
-                    {prop.get('Amenities', 'Not specified')}
-
-                    🗺️ Nearby Locations:
-                    {prop.get('Nearby Locations', 'Not specified')}
-
-                    🚗 Commute Times:
-                    {prop.get('Commute Times', 'Not specified')}
-                """
-                return details.strip()
+        prop = self.catalog.find_by_name(property_name)
+        if prop:
+            details = f"""
+                {prop['Building Name']}
+
+                📍 Location: {prop['Location']}, {prop['Street Name']}
+                🏢 Types: {prop['Apartment Types']}
+                📐 Sizes: {prop['Apartment Sizes']}
+                💰 Price: ₹{prop['Price Range (Lakhs)']} lakhs
+                🎯 Status: {prop['Availability Status']}
+                🏗️ Builder: {prop['Builder Name']}
+                📞 Contact: {prop['Builder Contact']}
+
+                🏊 Amenities:
+                {prop.get('Amenities', 'Not specified')}
+
+                🗺️ Nearby Locations:
+                {prop.get('Nearby Locations', 'Not specified')}
+
+                🚗 Commute Times:
+                {prop.get('Commute Times', 'Not specified')}
+            """
+            return details.strip()
 
         return f"No detailed information found for '{property_name}'"
     
     def find_nearby_places(self, lat, lng, place_type="school", radius=2000):
-        """Find nearby places using Google Places API"""
-        google_api_key = GOOGLE_MAPS_API_KEY
-        if not google_api_key:
-            return {"error": "Google Maps API key not configured"}
-        
-        # Map common requests to Google Places types
-        type_mapping = {
-            'school': 'school',
-            'hospital': 'hospital',
-            'mall': 'shopping_mall',
-            'shopping': 'shopping_mall',
-            'restaurant': 'restaurant',
-            'bank': 'bank',
-            'pharmacy': 'pharmacy',
-            'gym': 'gym',
-            'park': 'park',
-            'airport': 'airport',
-            'bus': 'bus_station',
-            'railway': 'train_station',
-            'temple': 'hindu_temple',
-            'church': 'church',
-            'mosque': 'mosque'
-        }
-        
-        google_type = type_mapping.get(place_type.lower(), place_type)
-        
-        url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-        params = {
-            'location': f"{lat},{lng}",
-            'radius': radius,
-            'type': google_type,
-            'key': google_api_key
-        }
-        
-        try:
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            if data.get('status') == 'OK':
-                places = []
-                for place in data.get('results', [])[:8]:  # Limit to 8 results
-                    place_info = {
-                        'name': place.get('name'),
-                        'vicinity': place.get('vicinity'),
-                        'rating': place.get('rating'),
-                        'types': place.get('types', []),
-                        'location': place.get('geometry', {}).get('location', {}),
-                        'price_level': place.get('price_level'),
-                        'photos': place.get('photos', [])
-                    }
-                    places.append(place_info)
-                
-                return {"places": places, "count": len(places)}
-            else:
-                return {"error": f"Google Places API error: {data.get('status')}"}
-        
-        except Exception as e:
-            return {"error": f"Error calling Google Places API: {str(e)}"}
+        """Find nearby places using Google Places API, through the shared cached places service"""
+        return get_places_service().find_nearby_places(lat, lng, place_type, radius)
     
-    def get_enhanced_prompt(self) -> str:        
-        prompt = get_prompt(self.properties_data)
-        return prompt
\ No newline at end of file
+    def get_enhanced_prompt(self) -> str:
+        return self._initial_system_prompt["parts"][0]
\ No newline at end of file
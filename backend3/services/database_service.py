@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from core.config import DATABASE_FILE, SCHEDULE_DATA, USERS_FILE
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    phone TEXT NOT NULL UNIQUE,
+    email TEXT UNIQUE,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    phone TEXT,
+    date TEXT NOT NULL DEFAULT '',
+    time TEXT NOT NULL DEFAULT '',
+    message TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created_at TEXT,
+    updated_at TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_phone_date_time ON appointments(phone, date, time, id);
+CREATE INDEX IF NOT EXISTS idx_appointments_date_time ON appointments(date, time, id);
+CREATE INDEX IF NOT EXISTS idx_appointments_status_date_time ON appointments(status, date, time, id);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+APPOINTMENT_COLUMNS = ("id", "name", "phone", "date", "time", "message", "status", "created_at", "updated_at")
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10.0, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Per-thread connection to DATABASE_FILE; creates the schema and migrates JSON data on first use"""
+    global _initialized
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect(DATABASE_FILE)
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                conn.executescript(SCHEMA)
+                migrate_json_files(conn)
+                _initialized = True
+    return conn
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """Run the block in one write transaction, committed on success and rolled back on error"""
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _load_json(path: Optional[str]) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.error(f"Error reading {path}: {str(e)}")
+        return {}
+
+
+def migrate_json_files(conn: sqlite3.Connection, users_file: Optional[str] = USERS_FILE,
+                       schedule_file: Optional[str] = SCHEDULE_DATA):
+    """One-shot import of the legacy users and schedule JSON files.
+
+    Each file is imported once, recorded in the migrations table; rows that
+    already exist are left untouched. The check runs inside the write
+    transaction, so workers starting together import each file only once.
+    """
+    for name, path, importer in (("users_json", users_file, _import_users),
+                                 ("schedule_json", schedule_file, _import_appointments)):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone():
+                conn.execute("ROLLBACK")
+                continue
+            records = _load_json(path)
+            importer(conn, records.values())
+            conn.execute("INSERT INTO migrations (name) VALUES (?)", (name,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        logger.info(f"Migrated {len(records)} records from {path} into {DATABASE_FILE}")
+
+
+def _import_users(conn: sqlite3.Connection, users):
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (id, phone, email, created_at) VALUES (?, ?, ?, ?)",
+        [(u["id"], u["phone"], u.get("email"), u.get("created_at", "")) for u in users if u.get("id") and u.get("phone")],
+    )
+
+
+def _import_appointments(conn: sqlite3.Connection, appointments):
+    conn.executemany(
+        "INSERT OR IGNORE INTO appointments (id, name, phone, date, time, message, status, created_at, updated_at, extra) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [appointment_row(a) for a in appointments if a.get("id")],
+    )
+
+
+def appointment_row(appointment: dict) -> tuple:
+    """Column values for an appointment dict; unknown keys are kept as JSON in `extra`"""
+    extra = {k: v for k, v in appointment.items() if k not in APPOINTMENT_COLUMNS}
+    values = [appointment.get(column) for column in APPOINTMENT_COLUMNS]
+    values[APPOINTMENT_COLUMNS.index("status")] = appointment.get("status") or "pending"
+    # Keyset pagination orders by (date, time, id), which must not be NULL
+    values[APPOINTMENT_COLUMNS.index("date")] = appointment.get("date") or ""
+    values[APPOINTMENT_COLUMNS.index("time")] = appointment.get("time") or ""
+    return tuple(values) + (json.dumps(extra) if extra else None,)
+
+
+def appointment_from_row(row: sqlite3.Row) -> dict:
+    appointment = {column: row[column] for column in APPOINTMENT_COLUMNS}
+    if row["extra"]:
+        appointment.update(json.loads(row["extra"]))
+    return appointment
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    get_connection()
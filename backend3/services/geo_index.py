@@ -0,0 +1,197 @@
+import logging
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+Point = Tuple[float, float]
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two lat/lng points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def building_coordinates(prop: Dict) -> Optional[Point]:
+    """(lat, lng) of a building, or None when missing (uploads turn blank cells into NaN)"""
+    try:
+        lat, lng = float(prop.get('Latitude')), float(prop.get('Longitude'))
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(lat) or math.isnan(lng) or not lat or not lng:
+        return None
+    return lat, lng
+
+
+class GeoIndex:
+    """Uniform lat/lng grid over a list of points, queried with haversine distances.
+
+    Point i of the input is returned as id i; None entries are skipped.
+    Points are sorted by grid cell so each cell is one contiguous slice,
+    and a query only computes distances for the cells overlapping its
+    bounding box. Results are (distance_km, id) pairs, nearest first, ties
+    broken by id. The grid does not wrap across the antimeridian.
+    """
+
+    def __init__(self, points: Sequence[Optional[Point]], cell_km: float = 1.0):
+        self.size = len(points)
+        self.cell_km = cell_km
+        self.cell_deg = cell_km / KM_PER_DEGREE
+
+        ids = np.array([i for i, point in enumerate(points) if point], dtype=np.int64)
+        coordinates = np.array([point for point in points if point], dtype=np.float64).reshape(-1, 2)
+        rows = np.floor(coordinates[:, 0] / self.cell_deg).astype(np.int64)
+        cols = np.floor(coordinates[:, 1] / self.cell_deg).astype(np.int64)
+        order = np.lexsort((ids, cols, rows))
+
+        self._ids = ids[order]
+        self._lat = np.radians(coordinates[order, 0])
+        self._lng = np.radians(coordinates[order, 1])
+        self._cos_lat = np.cos(self._lat)
+
+        # (row, col) -> (start, end) slice of the sorted arrays
+        self._cells: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        rows, cols = rows[order].tolist(), cols[order].tolist()
+        start = 0
+        for end in range(1, len(rows) + 1):
+            if end == len(rows) or rows[end] != rows[start] or cols[end] != cols[start]:
+                self._cells[(rows[start], cols[start])] = (start, end)
+                start = end
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, int]]:
+        """Points within radius_km of (lat, lng), nearest first"""
+        positions = self._candidates(lat, lng, radius_km)
+        if positions is not None and not len(positions):
+            return []
+        distances = self._distances(lat, lng, positions)
+        ids = self._ids if positions is None else self._ids[positions]
+        inside = distances <= radius_km
+        distances, ids = distances[inside], ids[inside]
+        order = np.lexsort((ids, distances))
+        return list(zip(distances[order].tolist(), ids[order].tolist()))
+
+    def nearest(self, lat: float, lng: float, n: int = 1,
+                max_km: Optional[float] = None) -> List[Tuple[float, int]]:
+        """The n points closest to (lat, lng), optionally no further than max_km"""
+        limit = HALF_CIRCUMFERENCE_KM if max_km is None else max_km
+        radius = min(self.cell_km, limit)
+        while True:
+            found = self.within(lat, lng, radius)
+            # Everything inside radius was returned, so the first n found are the n nearest overall
+            if len(found) >= n or radius >= limit:
+                return found[:n]
+            radius = min(radius * 4, limit)
+
+    def _candidates(self, lat: float, lng: float, radius_km: float) -> Optional[np.ndarray]:
+        """Sorted-array positions in the cells overlapping the query box, or None to scan everything"""
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_span, 90.0)))
+        if lat_span >= 90 or cos_lat < 1e-6 or lat_span / cos_lat >= 180:
+            return None
+        lng_span = lat_span / cos_lat
+
+        row_lo, row_hi = math.floor((lat - lat_span) / self.cell_deg), math.floor((lat + lat_span) / self.cell_deg)
+        col_lo, col_hi = math.floor((lng - lng_span) / self.cell_deg), math.floor((lng + lng_span) / self.cell_deg)
+
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > len(self._cells):
+            slices = [
+                span for (row, col), span in self._cells.items()
+                if row_lo <= row <= row_hi and col_lo <= col <= col_hi
+            ]
+        else:
+            slices = [
+                self._cells[cell] for cell in (
+                    (row, col) for row in range(row_lo, row_hi + 1) for col in range(col_lo, col_hi + 1)
+                ) if cell in self._cells
+            ]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in slices])
+
+    def _distances(self, lat: float, lng: float, positions: Optional[np.ndarray]) -> np.ndarray:
+        phi = math.radians(lat)
+        lat2 = self._lat if positions is None else self._lat[positions]
+        lng2 = self._lng if positions is None else self._lng[positions]
+        cos_lat2 = self._cos_lat if positions is None else self._cos_lat[positions]
+        a = np.sin((lat2 - phi) / 2) ** 2 + math.cos(phi) * cos_lat2 * np.sin((lng2 - math.radians(lng)) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class PoiIndex:
+    """Points of interest seen in the nearby-places cache, spatially indexed"""
+
+    def __init__(self, places: Sequence[Dict[str, Any]], version: Any = None):
+        self.places = list(places)
+        self.version = version
+        self.geo = GeoIndex([(place["lat"], place["lng"]) for place in self.places])
+        self._names = [str(place.get("name") or "").lower() for place in self.places]
+
+    @classmethod
+    def from_cache_rows(cls, rows, version: Any = None) -> "PoiIndex":
+        """Build from (cache_key, result) rows, de-duplicating places returned for several buildings"""
+        places: Dict[Tuple, Dict[str, Any]] = {}
+        for key, result in rows:
+            query_type = key[3]
+            for place in result.get("places", []):
+                location = place.get("location") or {}
+                if location.get("lat") is None or location.get("lng") is None:
+                    continue
+                lat, lng = float(location["lat"]), float(location["lng"])
+                entry = places.setdefault((place.get("name"), round(lat, 5), round(lng, 5)), {
+                    "name": place.get("name"),
+                    "vicinity": place.get("vicinity"),
+                    "lat": lat,
+                    "lng": lng,
+                    "types": set(place.get("types") or []),
+                })
+                entry["types"].add(query_type)
+        return cls(list(places.values()), version)
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def of_type(self, place_type: str) -> List[Dict[str, Any]]:
+        return [place for place in self.places if place_type in place["types"]]
+
+    def find(self, name: str) -> Optional[Dict[str, Any]]:
+        """The place whose name contains `name`, preferring the closest (shortest) name"""
+        name_lower = name.lower().strip()
+        if not name_lower:
+            return None
+        matches = [i for i, place_name in enumerate(self._names) if name_lower in place_name]
+        return self.places[min(matches, key=lambda i: len(self._names[i]))] if matches else None
+
+
+_poi_index = PoiIndex([])
+_poi_index_lock = threading.Lock()
+
+
+def get_poi_index() -> PoiIndex:
+    """POIs from the places cache, rebuilt whenever the cache has changed"""
+    global _poi_index
+    from services.places_service import get_places_service
+
+    try:
+        cache = get_places_service().cache
+        version = cache.version()
+        if version != _poi_index.version:
+            with _poi_index_lock:
+                if version != _poi_index.version:
+                    _poi_index = PoiIndex.from_cache_rows(cache.rows(), version)
+                    logger.info(f"Indexed {len(_poi_index)} cached places")
+    except Exception as e:
+        logger.error(f"Error indexing cached places: {str(e)}")
+    return _poi_index
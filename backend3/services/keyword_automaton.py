@@ -0,0 +1,59 @@
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Tuple
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a fixed set of keywords.
+
+    Built once, it finds every occurrence of every keyword in a text in a
+    single left-to-right pass, including overlapping and nested matches,
+    with the same substring semantics as `keyword in text`. Each keyword
+    carries one or more payloads that are reported with its matches.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Hashable]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[str, Any]]] = [[]]
+
+        for keyword, payload in keywords:
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append((keyword, payload))
+
+        # Breadth-first fail links; a state also reports the outputs of its fail state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str, Any]]:
+        """Yield (start, end, keyword, payload) for every match, ordered by end offset"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword, payload in outputs[state]:
+                yield end - len(keyword), end, keyword, payload
+
+    def payloads(self, text: str) -> List[Any]:
+        """Payloads of every keyword found in text, in order of first match, without duplicates"""
+        return list(dict.fromkeys(payload for _, _, _, payload in self.finditer(text)))
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from services.catalog_service import PropertyCatalog
+
+# Fields of the map-marker projection and the catalog columns they come from
+MAP_FIELDS = {
+    'name': 'Building Name',
+    'location': 'Location',
+    'lat': 'Latitude',
+    'lng': 'Longitude',
+    'price': 'Price Range (Lakhs)',
+    'types': 'Apartment Types',
+    'amenities': 'Amenities',
+    'contact': 'Builder Contact',
+    'builder': 'Builder Name',
+    'status': 'Availability Status',
+}
+
+
+def sanitize_property(prop: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace NaN/inf values, which are not valid JSON, with None"""
+    return {
+        k: (None if isinstance(v, float) and (math.isnan(v) or math.isinf(v)) else v)
+        for k, v in prop.items()
+    }
+
+
+def encode_json(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def matches_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header already names this ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class PropertyListing:
+    """The /properties/list_properties payload for one catalog version.
+
+    The sanitized properties, the map-marker projection and the encoded
+    response body are built once; the catalog version doubles as the ETag.
+    query() serves projected, filtered and paginated views from the same data.
+    """
+
+    def __init__(self, catalog: PropertyCatalog):
+        self.version = catalog.version
+        self.etag = f'"{catalog.version}"'
+        self.columns = catalog.columns
+        self.properties: Tuple[Dict[str, Any], ...] = tuple(sanitize_property(prop) for prop in catalog.properties)
+
+        # Marker for each row with coordinates (None otherwise); ids number the markers in catalog order
+        self.markers: List[Optional[Dict[str, Any]]] = []
+        self.map_properties: List[Dict[str, Any]] = []
+        for prop in self.properties:
+            marker = None
+            if prop.get('Latitude') and prop.get('Longitude'):
+                marker = {'id': len(self.map_properties) + 1}
+                marker.update({field: prop.get(column) for field, column in MAP_FIELDS.items()})
+                self.map_properties.append(marker)
+            self.markers.append(marker)
+
+        self.body = encode_json({
+            "properties": self.properties,
+            "map_properties": self.map_properties,
+            "count": len(self.map_properties),
+        })
+
+    def query_etag(self, query_string: str) -> str:
+        """ETag of a parameterized view: the catalog version plus a digest of the query"""
+        digest = hashlib.sha1(query_string.encode("utf-8")).hexdigest()[:12]
+        return f'"{self.version}-{digest}"'
+
+    def filter_rows(self, location: Optional[str] = None, bhk: Optional[int] = None,
+                    min_price: Optional[float] = None, max_price: Optional[float] = None) -> Iterable[int]:
+        """Row indices matching every given filter, in catalog order"""
+        location_lower = location.lower() if location else None
+        for i, prop in enumerate(self.properties):
+            if location_lower and location_lower not in str(prop.get('Location') or '').lower():
+                continue
+            if bhk is not None and not self.columns.offers_bhk(i, bhk):
+                continue
+            if min_price is not None or max_price is not None:
+                bounds = self.columns.price_bounds(i)
+                if not bounds:
+                    continue
+                if max_price is not None and bounds[0] > max_price:
+                    continue
+                if min_price is not None and bounds[1] < min_price:
+                    continue
+            yield i
+
+    def query(self, fields: Optional[Sequence[str]] = None, view: str = "full", location: Optional[str] = None,
+              bhk: Optional[int] = None, min_price: Optional[float] = None, max_price: Optional[float] = None,
+              offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Filtered page of the listing.
+
+        view is "full" (properties and map markers), "map" (markers only) or
+        "list" (properties only); fields limits the property columns
+        returned. A price filter keeps buildings whose price range overlaps
+        [min_price, max_price] lakhs.
+        """
+        rows = list(self.filter_rows(location, bhk, min_price, max_price))
+        if view == "map":
+            rows = [i for i in rows if self.markers[i] is not None]
+        page = rows[offset:offset + limit] if limit else rows[offset:]
+
+        payload: Dict[str, Any] = {}
+        if view != "map":
+            if fields:
+                payload["properties"] = [{f: self.properties[i].get(f) for f in fields} for i in page]
+            else:
+                payload["properties"] = [self.properties[i] for i in page]
+        if view != "list":
+            payload["map_properties"] = [self.markers[i] for i in page if self.markers[i] is not None]
+            payload["count"] = len(payload["map_properties"])
+
+        next_offset = offset + len(page)
+        payload.update({
+            "total": len(rows),
+            "offset": offset,
+            "limit": limit,
+            "next_offset": next_offset if next_offset < len(rows) else None,
+        })
+        return payload
+
+
+_listing: Optional[PropertyListing] = None
+_listing_lock = threading.Lock()
+
+
+def get_listing(catalog: PropertyCatalog) -> PropertyListing:
+    """Return the listing for this catalog version, building it on first use"""
+    global _listing
+    listing = _listing
+    if listing is None or listing.version != catalog.version:
+        with _listing_lock:
+            if _listing is None or _listing.version != catalog.version:
+                _listing = PropertyListing(catalog)
+            listing = _listing
+    return listing
+
+
+def clear_listing():
+    """Drop the cached listing, e.g. after the catalog is replaced"""
+    global _listing
+    with _listing_lock:
+        _listing = None
@@ -0,0 +1,59 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from core.config import LLM_MAX_CONCURRENCY
+
+# The Gemini SDK calls used here are blocking; they run on this bounded pool
+# so a slow reply never stalls the event loop.
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking LLM call on the bounded executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def stream_blocking(func: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+    """Drive a blocking generator on the bounded executor and yield its items as they arrive.
+
+    If the consumer stops early (e.g. the client disconnects) the producer
+    is told to stop at its next item.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            for item in func(*args, **kwargs):
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, _Failure(e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+
+    producer = loop.run_in_executor(_executor, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        cancelled.set()
+    await producer
@@ -0,0 +1,136 @@
+"""Precompute nearby places for every building in the catalog.
+
+Building coordinates only change when a new catalog is uploaded, so the
+nearby results for every (building, place type) pair can be fetched ahead
+of time into the places cache that /properties/nearby reads from. A run
+only calls the upstream for pairs without a fresh cache entry, which after
+an upload means the buildings that are new or whose coordinates moved.
+
+Run from the backend directory:
+
+    python -m services.places_precompute
+    python -m services.places_precompute --force --workers 2 --rate 2
+"""
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from core.config import PLACES_PRECOMPUTE_RATE_PER_SECOND, PLACES_PRECOMPUTE_WORKERS
+from services.geo_index import building_coordinates
+from services.places_service import DEFAULT_RADIUS, TYPE_MAPPING, CacheKey, NearbyPlacesService, get_places_service
+
+logger = logging.getLogger(__name__)
+
+# Aliases such as 'mall' and 'shopping' share one Google type, so fetch each type once
+PLACE_TYPES = list(dict.fromkeys(TYPE_MAPPING.values()))
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate_per_second apart across all threads"""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def plan_refresh(service: NearbyPlacesService, properties: Iterable[Dict], place_types: Sequence[str],
+                 radius: int, force: bool = False) -> Dict[str, Any]:
+    """Cache keys that need an upstream call, de-duplicated across buildings sharing coordinates"""
+    keys: Dict[CacheKey, None] = {}
+    buildings = pairs = 0
+    for prop in properties:
+        coordinates = building_coordinates(prop)
+        if not coordinates:
+            continue
+        buildings += 1
+        for place_type in place_types:
+            pairs += 1
+            key = service.cache_key(*coordinates, place_type, radius)
+            if key not in keys and (force or not service.is_fresh(key)):
+                keys[key] = None
+    return {"buildings": buildings, "pairs": pairs, "keys": list(keys)}
+
+
+def precompute_nearby_places(properties: Iterable[Dict], service: Optional[NearbyPlacesService] = None,
+                             place_types: Sequence[str] = PLACE_TYPES, radius: int = DEFAULT_RADIUS,
+                             workers: int = PLACES_PRECOMPUTE_WORKERS,
+                             rate_per_second: float = PLACES_PRECOMPUTE_RATE_PER_SECOND,
+                             force: bool = False) -> Dict[str, int]:
+    """Fetch nearby places for every building and place type that has no fresh cache entry"""
+    service = service or get_places_service()
+    if not service.api_key:
+        logger.warning("Skipping nearby places precompute: Google Maps API key not configured")
+        return {"buildings": 0, "planned": 0, "refreshed": 0, "failed": 0, "skipped": 0}
+
+    plan = plan_refresh(service, properties, place_types, radius, force)
+    keys = plan["keys"]
+    limiter = RateLimiter(rate_per_second)
+
+    def refresh(key: CacheKey) -> bool:
+        limiter.wait()
+        try:
+            service.refresh(key)
+        except Exception as e:
+            logger.error(f"Nearby places precompute failed for {key}: {str(e)}")
+        return service.is_fresh(key)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="places-precompute") as pool:
+        refreshed = sum(pool.map(refresh, keys))
+
+    summary = {
+        "buildings": plan["buildings"],
+        "planned": len(keys),
+        "refreshed": refreshed,
+        "failed": len(keys) - refreshed,
+        "skipped": plan["pairs"] - len(keys),
+    }
+    logger.info(f"Nearby places precompute finished in {time.perf_counter() - started:.1f}s: {summary}")
+    return summary
+
+
+# Runs queue behind each other, so back-to-back uploads never fetch the same key twice at once
+_precompute_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="places-precompute-job")
+
+
+def schedule_precompute(properties: Iterable[Dict]):
+    """Precompute nearby places for a freshly loaded catalog in the background"""
+    properties = tuple(properties)
+    future = _precompute_executor.submit(precompute_nearby_places, properties)
+    future.add_done_callback(
+        lambda f: f.exception() and logger.error(f"Nearby places precompute failed: {f.exception()}")
+    )
+    return future
+
+
+def main():
+    from services.catalog_service import load_catalog
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="properties JSON file (defaults to APARTMENT_DATA)")
+    parser.add_argument("--workers", type=int, default=PLACES_PRECOMPUTE_WORKERS)
+    parser.add_argument("--rate", type=float, default=PLACES_PRECOMPUTE_RATE_PER_SECOND,
+                        help="upstream calls per second")
+    parser.add_argument("--force", action="store_true", help="refetch every building, fresh or not")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = load_catalog(args.file) if args.file else load_catalog()
+    print(precompute_nearby_places(catalog.properties, workers=args.workers,
+                                   rate_per_second=args.rate, force=args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import (
+    GOOGLE_MAPS_API_KEY,
+    PLACES_CACHE_FILE,
+    PLACES_CACHE_STALE_SECONDS,
+    PLACES_CACHE_TTL_SECONDS,
+    PLACES_CONNECT_TIMEOUT_SECONDS,
+    PLACES_READ_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+MAX_PLACES = 8
+DEFAULT_RADIUS = 2000
+
+# Map common requests to Google Places types
+TYPE_MAPPING = {
+    'school': 'school',
+    'hospital': 'hospital',
+    'mall': 'shopping_mall',
+    'shopping': 'shopping_mall',
+    'restaurant': 'restaurant',
+    'bank': 'bank',
+    'pharmacy': 'pharmacy',
+    'gym': 'gym',
+    'park': 'park',
+    'airport': 'airport',
+    'bus': 'bus_station',
+    'railway': 'train_station',
+    'temple': 'hindu_temple',
+    'church': 'church',
+    'mosque': 'mosque'
+}
+
+# Upstream statuses whose answers are worth caching; anything else is retried next time
+CACHEABLE_STATUSES = {"OK", "ZERO_RESULTS"}
+
+CacheKey = Tuple[float, float, int, str]
+Fetcher = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class GooglePlacesClient:
+    """Nearby Search over a pooled, keep-alive HTTP session with explicit timeouts"""
+
+    def __init__(self, timeout: Tuple[float, float] = (PLACES_CONNECT_TIMEOUT_SECONDS, PLACES_READ_TIMEOUT_SECONDS),
+                 pool_size: int = 10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+    def __call__(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.get(PLACES_URL, params=params, timeout=self.timeout)
+        return response.json()
+
+
+def google_type_for(place_type: str) -> str:
+    return TYPE_MAPPING.get(place_type.lower(), place_type)
+
+
+def format_places(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a raw Nearby Search response the way /properties/nearby returns it; ZERO_RESULTS is an empty list"""
+    if data.get('status') not in CACHEABLE_STATUSES:
+        return {"error": f"Google Places API error: {data.get('status')}"}
+    places = []
+    for place in data.get('results', [])[:MAX_PLACES]:
+        places.append({
+            'name': place.get('name'),
+            'vicinity': place.get('vicinity'),
+            'rating': place.get('rating'),
+            'types': place.get('types', []),
+            'location': place.get('geometry', {}).get('location', {}),
+            'price_level': place.get('price_level'),
+            'photos': place.get('photos', [])
+        })
+    return {"places": places, "count": len(places)}
+
+
+class PlacesCache:
+    """Nearby results persisted in SQLite, keyed by (lat, lng, radius, type)"""
+
+    def __init__(self, path: str = PLACES_CACHE_FILE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS places_cache ("
+                "cache_key TEXT PRIMARY KEY, result TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def encode_key(key: CacheKey) -> str:
+        return json.dumps(key)
+
+    def get(self, key: CacheKey) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, fetched_at FROM places_cache WHERE cache_key = ?", (self.encode_key(key),)
+            ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[0])
+        # Earlier versions stored ZERO_RESULTS as an error payload; treat those as missing so they are refetched
+        if "error" in result:
+            return None
+        return result, row[1]
+
+    def set(self, key: CacheKey, result: Dict[str, Any], fetched_at: Optional[float] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places_cache (cache_key, result, fetched_at) VALUES (?, ?, ?)",
+                (self.encode_key(key), json.dumps(result), fetched_at or time.time()),
+            )
+
+    def version(self) -> Tuple[int, Optional[float]]:
+        """Changes whenever an entry is added or refreshed"""
+        with self._lock:
+            return tuple(self._conn.execute("SELECT COUNT(*), MAX(fetched_at) FROM places_cache").fetchone())
+
+    def rows(self) -> List[Tuple[CacheKey, Dict[str, Any]]]:
+        """Every cached (key, result) pair"""
+        with self._lock:
+            rows = self._conn.execute("SELECT cache_key, result FROM places_cache").fetchall()
+        return [(tuple(json.loads(key)), json.loads(result)) for key, result in rows]
+
+
+class NearbyPlacesService:
+    """Google Places nearby lookups with a persistent cache.
+
+    Results are fresh for ttl_seconds; for stale_seconds after that the
+    cached result is returned immediately while a single background refresh
+    runs. Concurrent lookups for the same key share one upstream call.
+    The upstream is any callable taking the Nearby Search params and
+    returning its JSON, so tests can pass a stub instead of the network.
+    """
+
+    def __init__(self, fetcher: Optional[Fetcher] = None, cache: Optional[PlacesCache] = None,
+                 api_key: Optional[str] = GOOGLE_MAPS_API_KEY, ttl_seconds: float = PLACES_CACHE_TTL_SECONDS,
+                 stale_seconds: float = PLACES_CACHE_STALE_SECONDS):
+        self.fetcher = fetcher or GooglePlacesClient()
+        self.cache = cache or PlacesCache()
+        self.api_key = api_key
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="places-refresh")
+        self.stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "upstream_calls": 0, "coalesced": 0}
+
+    @staticmethod
+    def cache_key(lat, lng, place_type: str, radius: int) -> CacheKey:
+        # ~1 m precision, so float noise in stored coordinates still hits the same entry
+        return round(float(lat), 5), round(float(lng), 5), int(radius), google_type_for(place_type)
+
+    def find_nearby_places(self, lat, lng, place_type: str = "school", radius: int = DEFAULT_RADIUS) -> Dict[str, Any]:
+        """Find nearby places, from the cache when possible"""
+        if not self.api_key:
+            return {"error": "Google Maps API key not configured"}
+
+        key = self.cache_key(lat, lng, place_type, radius)
+        cached = self.cache.get(key)
+        if cached:
+            result, fetched_at = cached
+            age = time.time() - fetched_at
+            if age < self.ttl_seconds:
+                self.stats["fresh_hits"] += 1
+                return result
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stats["stale_hits"] += 1
+                self._refresher.submit(self._fetch, key)
+                return result
+
+        self.stats["misses"] += 1
+        return self._fetch(key)
+
+    def is_fresh(self, key: CacheKey) -> bool:
+        """Whether key has a cached result younger than ttl_seconds"""
+        cached = self.cache.get(key)
+        return bool(cached) and time.time() - cached[1] < self.ttl_seconds
+
+    def refresh(self, key: CacheKey) -> Dict[str, Any]:
+        """Fetch key from the upstream regardless of what is cached"""
+        return self._fetch(key)
+
+    def _fetch(self, key: CacheKey) -> Dict[str, Any]:
+        """Call the upstream for key, sharing the call with concurrent requests for the same key"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._call_upstream(key)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _call_upstream(self, key: CacheKey) -> Dict[str, Any]:
+        lat, lng, radius, google_type = key
+        params = {
+            'location': f"{lat},{lng}",
+            'radius': radius,
+            'type': google_type,
+            'key': self.api_key
+        }
+        try:
+            self.stats["upstream_calls"] += 1
+            data = self.fetcher(params)
+        except Exception as e:
+            return {"error": f"Error calling Google Places API: {str(e)}"}
+
+        result = format_places(data)
+        if data.get('status') in CACHEABLE_STATUSES:
+            self.cache.set(key, result)
+        return result
+
+
+_places_service: Optional[NearbyPlacesService] = None
+_places_service_lock = threading.Lock()
+
+
+def get_places_service() -> NearbyPlacesService:
+    """Return the process-wide nearby-places service, creating it on first use"""
+    global _places_service
+    if _places_service is None:
+        with _places_service_lock:
+            if _places_service is None:
+                _places_service = NearbyPlacesService()
+    return _places_service
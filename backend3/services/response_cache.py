@@ -0,0 +1,89 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+TRAILING_PUNCTUATION_PATTERN = re.compile(r'[\s?!.,;:]+$')
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation insensitive form of a query"""
+    query = WHITESPACE_PATTERN.sub(' ', query.strip().lower())
+    return TRAILING_PUNCTUATION_PATTERN.sub('', query)
+
+
+class ResponseCache:
+    """LRU cache of chat replies with a per-entry TTL.
+
+    Keys combine the catalog version, the normalized query and the
+    preferences extracted from it, so replies never outlive the catalog
+    they were generated from. Callers only consult the cache for turns
+    whose answer does not depend on earlier conversation.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(catalog_version: str, query: str, preferences: Dict[str, Any]) -> Tuple[str, str, str]:
+        return catalog_version, normalize_query(query), json.dumps(preferences, sort_keys=True, default=str)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[str, str, str], value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached reply, e.g. after the catalog is replaced"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+response_cache = ResponseCache()
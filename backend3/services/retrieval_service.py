@@ -0,0 +1,312 @@
+import heapq
+import json
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from core.config import GEO_NEAR_RADIUS_KM
+from services.geo_index import GeoIndex, get_poi_index
+from services.places_service import google_type_for
+from services.property_columns import PropertyColumns, parse_commute_limit
+
+BHK_PATTERN = re.compile(r'(\d+)\s*bhk')
+CRORE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:cr|crore|crores)\b')
+LAKH_MAX_PATTERN = re.compile(r'(?:under|below|within|max|maximum|upto|up to)\s*(?:₹|rs\.?\s*)?(\d+)\s*(?:lakh|lakhs|l)\b')
+LAKH_RANGE_PATTERN = re.compile(r'(\d+)\s*(?:to|-)\s*(\d+)\s*(?:lakh|lakhs|l)\b')
+
+PROXIMITY_KEYWORDS = {
+    'airport': ['airport'],
+    'school': ['school', 'schools', 'education'],
+    'hospital': ['hospital', 'medical', 'healthcare'],
+    'mall': ['mall', 'shopping', 'market'],
+    'railway': ['railway', 'train', 'station'],
+    'tech park': ['tech park', 'office', 'it park'],
+    'city center': ['city center', 'city centre', 'downtown'],
+    'bus': ['bus stop', 'bus'],
+}
+
+AMENITY_KEYWORDS = [
+    'gym', 'pool', 'swimming', 'parking', 'garden', 'playground', 'play area',
+    'security', 'elevator', 'lift', 'clubhouse', 'jogging', 'power backup',
+]
+
+# Always sent for every retrieved building
+BASE_FIELDS = {
+    "Building Name": "name",
+    "Location": "location",
+    "Apartment Types": "types",
+    "Price Range (Lakhs)": "price_lakhs",
+    "Availability Status": "status",
+    "Builder Name": "builder",
+}
+
+# Sent only when the turn asks about them
+DETAIL_FIELDS = {
+    "Apartment Sizes": ("sizes", ['size', 'sqft', 'area', 'spacious', 'bhk', 'big', 'small']),
+    "Amenities": ("amenities", ['amenit', 'facilit', 'gym', 'pool', 'club', 'garden', 'play', 'security', 'lift']),
+    "Parking Available": ("parking", ['parking', 'car']),
+    "Nearby Locations": ("nearby", ['near', 'nearby', 'close', 'around', 'school', 'hospital', 'mall', 'airport', 'station']),
+    "Commute Times": ("commute", ['commute', 'distance', 'far', 'travel', 'mins', 'minutes', 'airport', 'station', 'tech park', 'city center']),
+    "Street Name": ("street", ['address', 'street', 'where']),
+    "Builder Contact": ("contact", ['contact', 'call', 'phone', 'number', 'visit', 'schedule', 'book', 'meet']),
+    "RERA Approved": ("rera_approved", ['rera', 'approv', 'legal']),
+    "RERA Number": ("rera_number", ['rera']),
+    "Year of Completion": ("completed", ['year', 'old', 'new', 'complet', 'ready', 'possession']),
+    "Floors": ("floors", ['floor', 'tall', 'storey']),
+    "Number of Apartments": ("units", ['units', 'how many apartments', 'flats']),
+    "Facing": ("facing", ['facing', 'direction', 'vaastu', 'vastu']),
+    "Vaastu Compliant": ("vaastu", ['vaastu', 'vastu']),
+    "Balconies": ("balconies", ['balcon']),
+    "Water Supply": ("water", ['water']),
+    "Flood Zone Risk": ("flood_risk", ['flood', 'rain', 'monsoon', 'risk']),
+    "Maintenance Charges (INR/month)": ("maintenance_inr_month", ['maintenance', 'monthly']),
+    "Security Deposit (Months)": ("deposit_months", ['deposit']),
+    "Pet Friendly": ("pet_friendly", ['pet', 'dog', 'cat']),
+    "Furnished Options": ("furnished", ['furnish']),
+    "Loan Eligibility": ("loan", ['loan', 'emi', 'finance']),
+    "Document Checklist": ("documents", ['document', 'paper']),
+    "Virtual Tour Link": ("virtual_tour", ['tour', 'virtual', 'video']),
+    "Building Photo URL": ("photo_url", ['photo', 'image', 'picture', 'pic']),
+}
+
+# Long URLs are only worth their tokens when explicitly asked for
+URL_FIELDS = {"Virtual Tour Link", "Building Photo URL"}
+
+MAX_FIELD_CHARS = 200
+
+COMMUTE_WEIGHT = 12
+COMMUTE_STEP_MINUTES = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for budgeting"""
+    return len(text) // 4 + 1
+
+
+def commute_score(minutes: float, max_minutes: float) -> int:
+    """Score for a commute within the user's limit: the base weight plus 1 per 5 minutes to spare"""
+    return COMMUTE_WEIGHT + int((max_minutes - minutes) // COMMUTE_STEP_MINUTES)
+
+
+def extract_preferences(query: str, preferences: Dict[str, Any], locations: Sequence[str],
+                        commute_destinations: Sequence[str] = ()) -> Dict[str, Any]:
+    """Update the session's stated preferences from a user query"""
+    query_lower = query.lower()
+
+    bhk_match = BHK_PATTERN.search(query_lower)
+    if bhk_match:
+        preferences["bhk"] = int(bhk_match.group(1))
+
+    crore_match = CRORE_PATTERN.search(query_lower)
+    lakh_range = LAKH_RANGE_PATTERN.search(query_lower)
+    lakh_max = LAKH_MAX_PATTERN.search(query_lower)
+    if crore_match:
+        preferences["max_budget"] = int(float(crore_match.group(1)) * 100)
+        preferences.pop("budget_range", None)
+    elif lakh_range:
+        preferences["budget_range"] = {"min": int(lakh_range.group(1)), "max": int(lakh_range.group(2))}
+        preferences.pop("max_budget", None)
+    elif lakh_max:
+        preferences["max_budget"] = int(lakh_max.group(1))
+        preferences.pop("budget_range", None)
+
+    for location in locations:
+        if location.lower() in query_lower:
+            preferences["preferred_location"] = location
+            break
+
+    for key, keywords in PROXIMITY_KEYWORDS.items():
+        if any(keyword in query_lower for keyword in keywords):
+            preferences["near"] = key
+            break
+
+    max_commute = parse_commute_limit(query_lower, commute_destinations)
+    if max_commute:
+        preferences["max_commute"] = max_commute
+
+    amenities = [amenity for amenity in AMENITY_KEYWORDS if amenity in query_lower]
+    if amenities:
+        preferences["amenities"] = list(dict.fromkeys(preferences.get("amenities", []) + amenities))
+
+    return preferences
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value == "" or (isinstance(value, float) and (math.isnan(value) or math.isinf(value)))
+
+
+class PropertyRetriever:
+    """Select the buildings and fields relevant to one chat turn.
+
+    Scoring follows backend2's PropertyFilter (location, BHK, budget, amenities,
+    proximity and free-text matches); the selected buildings are then packed
+    into the prompt as compact JSON until the token budget is spent.
+    A "near" preference also matches buildings within GEO_NEAR_RADIUS_KM of
+    a cached place of that type, and closer buildings win ties.
+    """
+
+    def __init__(self, properties: Sequence[Dict], columns: PropertyColumns, geo: Optional[GeoIndex] = None):
+        self.properties = properties
+        self.columns = columns
+        self.geo = geo
+        self._near_cache: Dict[Tuple, Dict[int, float]] = {}
+        self._names = [prop.get("Building Name", "").lower() for prop in properties]
+        self._searchable = [
+            f"{prop.get('Building Name', '')} {prop.get('Location', '')} {prop.get('Apartment Types', '')} {prop.get('Amenities', '')}".lower()
+            for prop in properties
+        ]
+        self._proximity = [
+            f"{prop.get('Commute Times', '')} {prop.get('Nearby Locations', '')}".lower()
+            for prop in properties
+        ]
+
+    def near_distances(self, near: str, radius_km: float = GEO_NEAR_RADIUS_KM) -> Dict[int, float]:
+        """Distance in km from each building to its closest cached place of the `near` type, within radius_km"""
+        if not self.geo or not len(self.geo):
+            return {}
+        pois = get_poi_index()
+        key = (near, radius_km, pois.version)
+        distances = self._near_cache.get(key)
+        if distances is None:
+            distances = {}
+            for place in pois.of_type(google_type_for(near)):
+                for distance, i in self.geo.within(place["lat"], place["lng"], radius_km):
+                    if distance < distances.get(i, math.inf):
+                        distances[i] = distance
+            if len(self._near_cache) >= 64:
+                self._near_cache.clear()
+            self._near_cache[key] = distances
+        return distances
+
+    def score(self, index: int, query_lower: str, query_words: List[str],
+              preferences: Dict[str, Any], recent: Sequence[str],
+              near_distances: Optional[Dict[int, float]] = None) -> int:
+        """Relevance score of one property for the current turn"""
+        prop = self.properties[index]
+        score = 0
+
+        name = self._names[index]
+        if name and name in query_lower:
+            score += 15
+        if prop.get("Building Name") in recent:
+            score += 4
+
+        if preferences.get("preferred_location"):
+            if preferences["preferred_location"].lower() in prop.get("Location", "").lower():
+                score += 10
+
+        if preferences.get("bhk") and self.columns.offers_bhk(index, preferences["bhk"]):
+            score += 8
+
+        price = self.columns.price_bounds(index)
+        if price:
+            if preferences.get("max_budget") and price[1] <= preferences["max_budget"]:
+                score += 6
+            budget_range = preferences.get("budget_range")
+            if budget_range and price[0] <= budget_range["max"] and price[1] >= budget_range["min"]:
+                score += 6
+
+        prop_amenities = prop.get("Amenities", "").lower()
+        for amenity in preferences.get("amenities", []):
+            if amenity in prop_amenities:
+                score += 3
+
+        if preferences.get("near") and (
+            preferences["near"] in self._proximity[index] or index in (near_distances or {})
+        ):
+            score += 12
+
+        max_commute = preferences.get("max_commute")
+        if max_commute:
+            minutes = self.columns.commute_to(index, max_commute["destination"])
+            if minutes is not None and minutes <= max_commute["minutes"]:
+                score += commute_score(minutes, max_commute["minutes"])
+
+        searchable_text = self._searchable[index]
+        for word in query_words:
+            if word in searchable_text:
+                score += 1
+
+        return score
+
+    def retrieve(self, query: str, preferences: Dict[str, Any],
+                 recent: Sequence[str] = (), limit: int = 6) -> List[Dict]:
+        """Return up to `limit` properties ranked by relevance, best first"""
+        query_lower = query.lower()
+        query_words = [word for word in query_lower.split() if len(word) > 2]
+        near_distances = self.near_distances(preferences["near"]) if preferences.get("near") else {}
+
+        scored = (
+            (-score, near_distances.get(i, math.inf), i)
+            for i in range(len(self.properties))
+            if (score := self.score(i, query_lower, query_words, preferences, recent, near_distances)) > 0
+        )
+        # Bounded heap: equal scores go to the closer building, then catalog order
+        return [self.properties[i] for _, _, i in heapq.nsmallest(limit, scored)]
+
+    def select_fields(self, query: str, preferences: Dict[str, Any]) -> List[str]:
+        """Property columns worth sending for this turn"""
+        query_lower = query.lower()
+        fields = list(BASE_FIELDS)
+        for field, (_, keywords) in DETAIL_FIELDS.items():
+            if any(keyword in query_lower for keyword in keywords):
+                fields.append(field)
+        if preferences.get("near"):
+            fields.extend(["Nearby Locations", "Commute Times"])
+        if preferences.get("max_commute"):
+            fields.append("Commute Times")
+        if preferences.get("amenities"):
+            fields.append("Amenities")
+        if preferences.get("bhk"):
+            fields.append("Apartment Sizes")
+        return list(dict.fromkeys(fields))
+
+    def build_context(self, query: str, preferences: Dict[str, Any], recent: Sequence[str] = (),
+                      token_budget: int = 1500, limit: int = 6) -> Tuple[str, List[str]]:
+        """Render the property context for one turn within token_budget.
+
+        Returns the context text and the names of the buildings it contains.
+        When nothing matches, a compact overview of the catalog is sent instead.
+        """
+        query_lower = query.lower()
+        fields = self.select_fields(query, preferences)
+        matches = self.retrieve(query, preferences, recent, limit)
+        if matches:
+            header = "Most relevant properties for this question:"
+        else:
+            matches = self.properties
+            header = "No direct match; overview of available properties:"
+
+        lines = [header]
+        used = estimate_tokens(header)
+        names = []
+        for prop in matches:
+            # A building the user names gets every non-URL column
+            if prop.get("Building Name", "").lower() in query_lower:
+                prop_fields = [field for field in prop if field not in URL_FIELDS or field in fields]
+            else:
+                prop_fields = fields
+            line = self._render(prop, prop_fields)
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                break
+            lines.append(line)
+            used += cost
+            names.append(prop.get("Building Name"))
+
+        if len(names) < len(matches):
+            lines.append(f"({len(matches) - len(names)} more matching properties not shown)")
+        return "\n".join(lines), names
+
+    def _render(self, prop: Dict, fields: Sequence[str]) -> str:
+        compact = {}
+        for field in fields:
+            value = prop.get(field)
+            if _is_missing(value):
+                continue
+            key = BASE_FIELDS.get(field) or DETAIL_FIELDS.get(field, (field,))[0]
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            if isinstance(value, str) and len(value) > MAX_FIELD_CHARS and field not in URL_FIELDS:
+                value = value[:MAX_FIELD_CHARS] + "..."
+            compact[key] = value
+        return json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
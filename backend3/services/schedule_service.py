@@ -0,0 +1,356 @@
+import base64
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import (
+    SCHEDULE_BACKEND,
+    SCHEDULE_DATA,
+    SCHEDULE_JOURNAL_COMPACT_ENTRIES,
+    SCHEDULE_JOURNAL_COMPACT_INTERVAL_SECONDS,
+)
+from services.database_service import APPOINTMENT_COLUMNS, appointment_from_row, appointment_row, get_connection, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+
+SortKey = Tuple[str, str, str]
+
+
+def sort_key(appointment: Dict[str, Any]) -> SortKey:
+    """Listing order of an appointment: date, then time, then id as a tie-breaker"""
+    return appointment.get("date") or "", appointment.get("time") or "", appointment["id"]
+
+
+def encode_cursor(appointment: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just past this appointment"""
+    return base64.urlsafe_b64encode(json.dumps(sort_key(appointment)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    try:
+        date, time_, appointment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(date), str(time_), str(appointment_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class SqliteAppointmentStore:
+    """Appointments in the SQLite database, one row per appointment keyed by id"""
+
+    def create(self, appointment: Dict[str, Any]) -> Dict[str, Any]:
+        with transaction() as conn:
+            conn.execute(
+                "INSERT INTO appointments (id, name, phone, date, time, message, status, created_at, updated_at, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                appointment_row(appointment),
+            )
+        return appointment
+
+    def get(self, appointment_id: str) -> Optional[Dict[str, Any]]:
+        row = get_connection().execute("SELECT * FROM appointments WHERE id = ?", (appointment_id,)).fetchone()
+        return appointment_from_row(row) if row else None
+
+    def update(self, appointment_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge changes into the appointment and bump updated_at; None if it does not exist"""
+        with transaction() as conn:
+            row = conn.execute("SELECT * FROM appointments WHERE id = ?", (appointment_id,)).fetchone()
+            if row is None:
+                return None
+            appointment = appointment_from_row(row)
+            appointment.update(changes)
+            appointment["id"] = appointment_id
+            appointment["updated_at"] = datetime.now().isoformat()
+            assignments = ", ".join(f"{column} = ?" for column in APPOINTMENT_COLUMNS[1:])
+            values = appointment_row(appointment)
+            conn.execute(
+                f"UPDATE appointments SET {assignments}, extra = ? WHERE id = ?",
+                values[1:] + (appointment_id,),
+            )
+        return appointment
+
+    def delete(self, appointment_id: str) -> Optional[Dict[str, Any]]:
+        """Remove the appointment and return it; None if it does not exist"""
+        with transaction() as conn:
+            row = conn.execute("SELECT * FROM appointments WHERE id = ?", (appointment_id,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM appointments WHERE id = ?", (appointment_id,))
+        return appointment_from_row(row)
+
+    def list(self) -> List[Dict[str, Any]]:
+        rows = get_connection().execute("SELECT * FROM appointments ORDER BY rowid")
+        return [appointment_from_row(row) for row in rows]
+
+    def query(self, status: Optional[str] = None, phone: Optional[str] = None, date_from: Optional[str] = None,
+              date_to: Optional[str] = None, descending: bool = False, cursor: Optional[str] = None,
+              limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        """One page of matching appointments ordered by date and time, the next cursor and the total.
+
+        Filters and keyset pagination are answered from the (phone|status|-, date, time, id) indexes.
+        """
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if phone:
+            conditions.append("phone = ?")
+            params.append(phone)
+        if date_from:
+            conditions.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("date <= ?")
+            params.append(date_to)
+
+        conn = get_connection()
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        total = conn.execute(f"SELECT COUNT(*) FROM appointments {where}", params).fetchone()[0]
+
+        if cursor:
+            conditions.append(f"(date, time, id) {'<' if descending else '>'} (?, ?, ?)")
+            params.extend(decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if descending else "ASC"
+        rows = conn.execute(
+            f"SELECT * FROM appointments {where} ORDER BY date {direction}, time {direction}, id {direction} LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+
+        appointments = [appointment_from_row(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(appointments[-1]) if len(rows) > limit else None
+        return appointments, next_cursor, total
+
+
+class JournalAppointmentStore:
+    """Appointments kept in the SCHEDULE_DATA JSON file plus an append-only journal.
+
+    SCHEDULE_DATA stays the familiar {id: appointment} snapshot. Every
+    create, update and delete appends one JSON line to `<SCHEDULE_DATA>.journal`
+    and is fsynced, so each write costs O(1) disk I/O. The in-memory index is
+    the snapshot with the journal replayed over it. A background thread
+    compacts the journal into a new snapshot written to a temp file and
+    renamed over the old one, so a crash at any point leaves either the old
+    or the new snapshot plus a journal whose replay is idempotent; a torn
+    last journal line from a crash mid-append is discarded on load.
+
+    The index lives in this process, so use one worker with this backend.
+    """
+
+    def __init__(self, snapshot_path: str = SCHEDULE_DATA, compact_entries: int = SCHEDULE_JOURNAL_COMPACT_ENTRIES,
+                 compact_interval_seconds: float = SCHEDULE_JOURNAL_COMPACT_INTERVAL_SECONDS):
+        self.snapshot_path = snapshot_path
+        self.journal_path = f"{snapshot_path}.journal"
+        self.compact_entries = compact_entries
+        self.compact_interval_seconds = compact_interval_seconds
+        self._lock = threading.RLock()
+        self._appointments: Dict[str, Dict[str, Any]] = {}
+        # Sort keys of every appointment, and per status and phone, kept ordered for range queries
+        self._order: List[SortKey] = []
+        self._by_status: Dict[str, List[SortKey]] = {}
+        self._by_phone: Dict[str, List[SortKey]] = {}
+        self._journal_entries = 0
+        self._load()
+        self._build_indexes()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._compactor: Optional[threading.Thread] = None
+        if compact_interval_seconds > 0:
+            self._compactor = threading.Thread(target=self._compact_forever, name="schedule-compactor", daemon=True)
+            self._compactor.start()
+
+    def create(self, appointment: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._append({"op": "put", "appointment": appointment})
+            if appointment["id"] in self._appointments:
+                self._unindex(self._appointments[appointment["id"]])
+            self._appointments[appointment["id"]] = appointment
+            self._index(appointment)
+        return appointment
+
+    def get(self, appointment_id: str) -> Optional[Dict[str, Any]]:
+        return self._appointments.get(appointment_id)
+
+    def update(self, appointment_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Merge changes into the appointment and bump updated_at; None if it does not exist"""
+        with self._lock:
+            if appointment_id not in self._appointments:
+                return None
+            appointment = dict(self._appointments[appointment_id])
+            appointment.update(changes)
+            appointment["id"] = appointment_id
+            appointment["updated_at"] = datetime.now().isoformat()
+            self._append({"op": "put", "appointment": appointment})
+            self._unindex(self._appointments[appointment_id])
+            self._appointments[appointment_id] = appointment
+            self._index(appointment)
+        return appointment
+
+    def delete(self, appointment_id: str) -> Optional[Dict[str, Any]]:
+        """Remove the appointment and return it; None if it does not exist"""
+        with self._lock:
+            if appointment_id not in self._appointments:
+                return None
+            self._append({"op": "delete", "id": appointment_id})
+            appointment = self._appointments.pop(appointment_id)
+            self._unindex(appointment)
+            return appointment
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._appointments.values())
+
+    def query(self, status: Optional[str] = None, phone: Optional[str] = None, date_from: Optional[str] = None,
+              date_to: Optional[str] = None, descending: bool = False, cursor: Optional[str] = None,
+              limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        """One page of matching appointments ordered by date and time, the next cursor and the total.
+
+        The narrowest sorted index (phone, status or all) is bisected to the
+        date range; only a second phone/status filter needs a per-row check.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            if phone:
+                keys = self._by_phone.get(phone, [])
+            elif status:
+                keys = self._by_status.get(status, [])
+            else:
+                keys = self._order
+            lo = bisect.bisect_left(keys, (date_from,)) if date_from else 0
+            hi = bisect.bisect_left(keys, (date_to + "\x00",)) if date_to else len(keys)
+
+            def matches(key: SortKey) -> bool:
+                return not (phone and status) or (self._appointments[key[2]].get("status") or "pending") == status
+
+            total = hi - lo if not (phone and status) else sum(1 for i in range(lo, hi) if matches(keys[i]))
+
+            if descending:
+                start = min(hi, bisect.bisect_left(keys, after, lo, hi)) if after else hi
+                positions = range(start - 1, lo - 1, -1)
+            else:
+                start = max(lo, bisect.bisect_right(keys, after, lo, hi)) if after else lo
+                positions = range(start, hi)
+
+            page = []
+            has_more = False
+            for i in positions:
+                if not matches(keys[i]):
+                    continue
+                if len(page) == limit:
+                    has_more = True
+                    break
+                page.append(dict(self._appointments[keys[i][2]]))
+
+        next_cursor = encode_cursor(page[-1]) if has_more else None
+        return page, next_cursor, total
+
+    def compact(self):
+        """Fold the journal into a new snapshot, atomically replacing SCHEDULE_DATA"""
+        with self._lock:
+            if self._journal_entries == 0:
+                return
+            directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+            fd, temp_path = tempfile.mkstemp(prefix=".schedule-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._appointments, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.snapshot_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            # Everything journaled so far is in the snapshot; start a fresh journal
+            self._journal.truncate(0)
+            self._journal.seek(0)
+            os.fsync(self._journal.fileno())
+            logger.info(f"Compacted {self._journal_entries} journal entries into {self.snapshot_path}")
+            self._journal_entries = 0
+
+    def _build_indexes(self):
+        for appointment in self._appointments.values():
+            key = sort_key(appointment)
+            self._order.append(key)
+            self._by_status.setdefault(appointment.get("status") or "pending", []).append(key)
+            if appointment.get("phone"):
+                self._by_phone.setdefault(appointment["phone"], []).append(key)
+        for keys in [self._order, *self._by_status.values(), *self._by_phone.values()]:
+            keys.sort()
+
+    def _index(self, appointment: Dict[str, Any]):
+        key = sort_key(appointment)
+        bisect.insort(self._order, key)
+        bisect.insort(self._by_status.setdefault(appointment.get("status") or "pending", []), key)
+        if appointment.get("phone"):
+            bisect.insort(self._by_phone.setdefault(appointment["phone"], []), key)
+
+    def _unindex(self, appointment: Dict[str, Any]):
+        key = sort_key(appointment)
+        for keys in (self._order, self._by_status.get(appointment.get("status") or "pending"),
+                     self._by_phone.get(appointment.get("phone"))):
+            if keys:
+                i = bisect.bisect_left(keys, key)
+                if i < len(keys) and keys[i] == key:
+                    del keys[i]
+
+    def _append(self, entry: Dict[str, Any]):
+        self._journal.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_entries += 1
+
+    def _load(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                self._appointments = json.load(f)
+
+        if not os.path.exists(self.journal_path):
+            return
+        valid_bytes = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete entry")
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Discarding torn entry at the end of {self.journal_path}")
+                    break
+                if entry["op"] == "put":
+                    self._appointments[entry["appointment"]["id"]] = entry["appointment"]
+                elif entry["op"] == "delete":
+                    self._appointments.pop(entry["id"], None)
+                valid_bytes += len(line)
+                self._journal_entries += 1
+        if valid_bytes < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    def _compact_forever(self):
+        while True:
+            time.sleep(self.compact_interval_seconds)
+            try:
+                if self._journal_entries >= self.compact_entries:
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Error compacting schedule journal: {str(e)}")
+
+
+def create_appointment_store(backend: str = SCHEDULE_BACKEND):
+    """Build the appointment store selected by SCHEDULE_BACKEND"""
+    if backend == "journal":
+        return JournalAppointmentStore()
+    if backend != "sqlite":
+        logger.warning(f"Unknown schedule backend '{backend}', using sqlite")
+    return SqliteAppointmentStore()
+
+
+appointment_store = create_appointment_store()
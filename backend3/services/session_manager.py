@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from core.config import SESSION_SWEEP_INTERVAL_SECONDS
+from services.session_store import SessionStore, create_session_store, dumps_state, loads_state
+
+logger = logging.getLogger(__name__)
+
+
+class SessionManager:
+    """Chat sessions kept as serialized state in a pluggable SessionStore.
+
+    A chatbot is rebuilt from its stored state for each turn and saved back
+    afterwards, so any worker or node sharing the store can serve any
+    session. The chatbot class must provide to_state() and from_state().
+    A daemon thread periodically asks the store to evict expired sessions.
+    """
+
+    def __init__(self, factory: Any, store: Optional[SessionStore] = None,
+                 sweep_interval_seconds: float = SESSION_SWEEP_INTERVAL_SECONDS):
+        self.factory = factory
+        self.store = store or create_session_store()
+        self.sweep_interval_seconds = sweep_interval_seconds
+        # One lock per session id while a turn is in flight in this process
+        self._turn_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_lock = threading.Lock()
+
+    def create(self) -> str:
+        """Create a session and return its id"""
+        session_id = f"session_{uuid.uuid4().hex}"
+        self.store.set(session_id, dumps_state(self.factory().to_state()))
+        self.start_sweeper()
+        return session_id
+
+    def exists(self, session_id: str) -> bool:
+        return self.store.get(session_id) is not None
+
+    @asynccontextmanager
+    async def checkout(self, session_id: str) -> AsyncIterator[Optional[Any]]:
+        """Load the session's chatbot for one turn and save its state afterwards.
+
+        Yields None if the session does not exist. Turns of the same session
+        in this process are serialized so neither overwrites the other's state.
+        The state is only written back if the session still exists, so a
+        session deleted or evicted mid-turn stays gone.
+        Store reads and writes run on the threadpool, since the sqlite and
+        redis stores block on disk or network I/O.
+        """
+        lock = self._turn_locks.get(session_id)
+        if lock is None:
+            lock = self._turn_locks[session_id] = asyncio.Lock()
+        async with lock:
+            state = await run_in_threadpool(self.store.get, session_id)
+            if state is None:
+                yield None
+                return
+            chatbot = self.factory.from_state(loads_state(state))
+            try:
+                yield chatbot
+            finally:
+                if not await run_in_threadpool(self.store.replace, session_id, dumps_state(chatbot.to_state())):
+                    logger.info(f"Session {session_id} ended during its turn; state not saved")
+
+    def delete(self, session_id: str) -> bool:
+        return self.store.delete(session_id)
+
+    def ids(self) -> List[str]:
+        return self.store.ids()
+
+    def sweep(self) -> int:
+        """Evict expired sessions and re-apply the store's limits"""
+        evicted = self.store.sweep()
+        if evicted:
+            logger.info(f"Session sweep evicted {evicted} sessions")
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.store.name, **self.store.stats()}
+
+    def start_sweeper(self):
+        """Start the background sweeper thread once"""
+        if self._sweeper is not None or self.sweep_interval_seconds <= 0:
+            return
+        with self._sweeper_lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep_forever, name="session-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval_seconds)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping sessions: {str(e)}")
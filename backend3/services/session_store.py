@@ -0,0 +1,338 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from core.config import (
+    SESSION_BACKEND,
+    SESSION_IDLE_TTL_SECONDS,
+    SESSION_MAX_COUNT,
+    SESSION_MEMORY_HIGH_WATER_MB,
+    SESSION_REDIS_URL,
+    SESSION_SQLITE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def dumps_state(state: Dict[str, Any]) -> str:
+    """Compact JSON encoding of a chatbot's to_state() output"""
+    return json.dumps(state, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads_state(raw: str) -> Dict[str, Any]:
+    return json.loads(raw)
+
+
+class SessionStore(ABC):
+    """Where serialized chat session state lives.
+
+    Stores map a session id to the JSON produced by dumps_state. get() counts
+    as an access for idle expiry and LRU purposes.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, session_id: str, state: str):
+        ...
+
+    @abstractmethod
+    def replace(self, session_id: str, state: str) -> bool:
+        """Overwrite an existing session only; False, without writing, if it is gone"""
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def ids(self) -> List[str]:
+        ...
+
+    def sweep(self) -> int:
+        """Evict expired sessions; returns how many were removed"""
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process store with idle expiry, an LRU count cap and a memory high-water mark.
+
+    Only suitable for a single worker: other processes cannot see these sessions.
+    """
+
+    name = "memory"
+
+    def __init__(self, idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS, max_sessions: int = SESSION_MAX_COUNT,
+                 memory_high_water_mb: float = SESSION_MEMORY_HIGH_WATER_MB):
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_sessions = max_sessions
+        self.memory_high_water_bytes = int(memory_high_water_mb * 1024 * 1024)
+        # session id -> (last access, serialized state), least recently used first
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.created = 0
+        self.deleted = 0
+        self.evictions = {"idle": 0, "lru": 0, "memory": 0}
+
+    def get(self, session_id: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if self._is_idle(entry[0], now):
+                self._remove(session_id)
+                self.evictions["idle"] += 1
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def set(self, session_id: str, state: str):
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+            else:
+                self.created += 1
+            self._sessions[session_id] = (time.monotonic(), state)
+            self._bytes += len(state)
+            self._enforce_limits()
+
+    def replace(self, session_id: str, state: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._remove(session_id)
+            self._sessions[session_id] = (time.monotonic(), state)
+            self._bytes += len(state)
+            self._enforce_limits()
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._remove(session_id)
+            self.deleted += 1
+            return True
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions.keys())
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [sid for sid, (last_access, _) in self._sessions.items() if self._is_idle(last_access, now)]
+            for session_id in expired:
+                self._remove(session_id)
+            self.evictions["idle"] += len(expired)
+            return len(expired) + self._enforce_limits()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "estimated_memory_bytes": self._bytes,
+                "memory_high_water_bytes": self.memory_high_water_bytes,
+                "created": self.created,
+                "deleted": self.deleted,
+                "evictions": dict(self.evictions),
+            }
+
+    def _is_idle(self, last_access: float, now: float) -> bool:
+        return self.idle_ttl_seconds > 0 and now - last_access > self.idle_ttl_seconds
+
+    def _remove(self, session_id: str):
+        _, state = self._sessions.pop(session_id)
+        self._bytes -= len(state)
+
+    def _enforce_limits(self) -> int:
+        """Evict least recently used sessions over the count or memory limit; caller holds the lock"""
+        evicted = 0
+        while self.max_sessions > 0 and len(self._sessions) > self.max_sessions:
+            self._remove(next(iter(self._sessions)))
+            self.evictions["lru"] += 1
+            evicted += 1
+
+        while self.memory_high_water_bytes > 0 and len(self._sessions) > 1 and self._bytes > self.memory_high_water_bytes:
+            self._remove(next(iter(self._sessions)))
+            self.evictions["memory"] += 1
+            evicted += 1
+        return evicted
+
+
+class SqliteSessionStore(SessionStore):
+    """Sessions in a SQLite file, shared by every worker process on the host.
+
+    Uses WAL mode so readers in one worker do not block writers in another.
+    Idle expiry and the count cap are applied by sweep().
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SESSION_SQLITE_PATH, idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS,
+                 max_sessions: int = SESSION_MAX_COUNT):
+        self.path = path
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated_at ON chat_sessions(updated_at)")
+        self.evictions = {"idle": 0, "lru": 0}
+
+    def get(self, session_id: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT state, updated_at FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.idle_ttl_seconds > 0 and now - row[1] > self.idle_ttl_seconds:
+                self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+                self.evictions["idle"] += 1
+                return None
+            self._conn.execute("UPDATE chat_sessions SET updated_at = ? WHERE session_id = ?", (now, session_id))
+            return row[0]
+
+    def set(self, session_id: str, state: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO chat_sessions (session_id, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                (session_id, state, time.time()),
+            )
+
+    def replace(self, session_id: str, state: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE chat_sessions SET state = ?, updated_at = ? WHERE session_id = ?",
+                (state, time.time(), session_id),
+            )
+            return cursor.rowcount > 0
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+            return cursor.rowcount > 0
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT session_id FROM chat_sessions ORDER BY updated_at")]
+
+    def sweep(self) -> int:
+        evicted = 0
+        with self._lock, self._conn:
+            if self.idle_ttl_seconds > 0:
+                cursor = self._conn.execute(
+                    "DELETE FROM chat_sessions WHERE updated_at < ?", (time.time() - self.idle_ttl_seconds,)
+                )
+                self.evictions["idle"] += cursor.rowcount
+                evicted += cursor.rowcount
+            if self.max_sessions > 0:
+                total = self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+                if total > self.max_sessions:
+                    cursor = self._conn.execute(
+                        "DELETE FROM chat_sessions WHERE session_id IN "
+                        "(SELECT session_id FROM chat_sessions ORDER BY updated_at LIMIT ?)",
+                        (total - self.max_sessions,),
+                    )
+                    self.evictions["lru"] += cursor.rowcount
+                    evicted += cursor.rowcount
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM chat_sessions"
+            ).fetchone()
+        return {
+            "total_sessions": total,
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "stored_bytes": stored,
+            "path": self.path,
+            "evictions": dict(self.evictions),
+        }
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis, shared by every worker and node.
+
+    Works with any client exposing get, set(ex=..., xx=...), expire, delete and
+    scan_iter(match=...), e.g. redis.Redis or a local stand-in. Idle expiry
+    uses key TTLs; memory bounds are left to the server's maxmemory policy.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS, prefix: str = "chat:session:"):
+        self.client = client
+        self.idle_ttl_seconds = int(idle_ttl_seconds)
+        self.prefix = prefix
+
+    def get(self, session_id: str) -> Optional[str]:
+        raw = self.client.get(self.prefix + session_id)
+        if raw is None:
+            return None
+        if self.idle_ttl_seconds > 0:
+            self.client.expire(self.prefix + session_id, self.idle_ttl_seconds)
+        return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+
+    def set(self, session_id: str, state: str):
+        self.client.set(self.prefix + session_id, state, ex=self.idle_ttl_seconds or None)
+
+    def replace(self, session_id: str, state: str) -> bool:
+        # XX only writes a key that still exists
+        return bool(self.client.set(self.prefix + session_id, state, ex=self.idle_ttl_seconds or None, xx=True))
+
+    def delete(self, session_id: str) -> bool:
+        return bool(self.client.delete(self.prefix + session_id))
+
+    def ids(self) -> List[str]:
+        ids = []
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            ids.append(key[len(self.prefix):])
+        return ids
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "total_sessions": len(self.ids()),
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+        }
+
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    """Build the session store selected by SESSION_BACKEND"""
+    if backend == "sqlite":
+        return SqliteSessionStore()
+    if backend == "redis":
+        import redis
+        return RedisSessionStore(redis.Redis.from_url(SESSION_REDIS_URL))
+    if backend != "memory":
+        logger.warning(f"Unknown session backend '{backend}', using memory")
+    return MemorySessionStore()
@@ -94,7 +94,8 @@ What kind of property are you looking for? 😊`,
 
   const loadProperties = async () => {
     try {
-      const response = await fetch(`${BASE_URL}/properties/list_properties`);
+      // Only building names are needed here; the map uses the marker projection
+      const response = await fetch(`${BASE_URL}/properties/list_properties?fields=${encodeURIComponent('Building Name')}`);
       const data = await response.json();
       console.log('Properties loaded:', data);
       setProperties(data.properties || []);
@@ -247,7 +248,7 @@ What kind of property are you looking for? 😊`,
       const sessionID = localStorage.getItem("session_id");
       console.log('Querying server with message:', message, 'Session ID:', sessionID);
 
-      const response = await fetch(`${BASE_URL}/chat`, {
+      const response = await fetch(`${BASE_URL}/chat/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -258,22 +259,67 @@ What kind of property are you looking for? 😊`,
         })
       });
 
-      const data = await response.json();
-      console.log('Response from server:', data);
+      if (!response.ok || !response.body) {
+        throw new Error(`Chat stream failed with status ${response.status}`);
+      }
 
-      const botMessage = {
-        id: Date.now() + 1,
-        type: 'bot',
-        content: data.response,
-        timestamp: new Date().toLocaleTimeString(),
-        properties: data.properties || [],
-        images: data.images || [],
-        proactive_suggestions: data.proactive_suggestions || []
+      // Show the reply as it is generated: add the bot message on the first
+      // token and keep appending to it until the server sends "done".
+      const botMessageId = Date.now() + 1;
+      let content = '';
+      const updateBotMessage = (changes) => {
+        setMessages(prev => {
+          if (prev.some(msg => msg.id === botMessageId)) {
+            return prev.map(msg => msg.id === botMessageId ? { ...msg, ...changes } : msg);
+          }
+          return [...prev, {
+            id: botMessageId,
+            type: 'bot',
+            content: '',
+            timestamp: new Date().toLocaleTimeString(),
+            properties: [],
+            images: [],
+            proactive_suggestions: [],
+            ...changes
+          }];
+        });
       };
 
-      setMessages(prev => [...prev, botMessage]);
-      setUserBehavior(data.user_behavior || {});
-      setProactiveSuggestions(data.proactive_suggestions || []);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const rawEvent of events) {
+          let eventName = 'message';
+          let eventData = '';
+          rawEvent.split('\n').forEach(line => {
+            if (line.startsWith('event:')) eventName = line.slice(6).trim();
+            else if (line.startsWith('data:')) eventData += line.slice(5).trim();
+          });
+          if (!eventData) continue;
+          const data = JSON.parse(eventData);
+
+          if (eventName === 'token') {
+            content += data.text;
+            updateBotMessage({ content });
+            setIsLoading(false);
+          } else if (eventName === 'done') {
+            console.log('Response from server:', content);
+            updateBotMessage({ content, proactive_suggestions: data.suggestions || [] });
+            setProactiveSuggestions(data.suggestions || []);
+          } else if (eventName === 'error') {
+            throw new Error(data.detail);
+          }
+        }
+      }
 
     } catch (error) {
       console.error('Error:', error);
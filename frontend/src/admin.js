@@ -4,6 +4,9 @@ import { BASE_URL } from './config';
 
 const AdminPage = () => {
   const [schedules, setSchedules] = useState([]);
+  const [totalSchedules, setTotalSchedules] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [statusFilter, setStatusFilter] = useState('');
   const [file, setFile] = useState(null);
   const [message, setMessage] = useState('');
   const [isUploading, setIsUploading] = useState(false);
@@ -20,12 +23,23 @@ const AdminPage = () => {
 
   useEffect(() => {
     fetchSchedules();
-  }, []);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [statusFilter]);
 
-  const fetchSchedules = () => {
-    fetch(`${BASE_URL}/admin/schedules`)
+  // Loads the first page, or appends the page after `cursor`
+  const fetchSchedules = (cursor = null) => {
+    const params = new URLSearchParams();
+    if (statusFilter) params.append('status', statusFilter);
+    if (cursor) params.append('cursor', cursor);
+
+    fetch(`${BASE_URL}/admin/schedules?${params.toString()}`)
       .then(res => res.json())
-      .then(data => setSchedules(data.users || []))
+      .then(data => {
+        const page = data.users || [];
+        setSchedules(prev => (cursor ? [...prev, ...page] : page));
+        setTotalSchedules(data.total ?? page.length);
+        setNextCursor(data.next_cursor || null);
+      })
       .catch(err => console.error('Error fetching schedules:', err));
   };
 
@@ -114,6 +128,7 @@ const AdminPage = () => {
         // Remove from local state
         const updatedSchedules = schedules.filter((_, i) => i !== index);
         setSchedules(updatedSchedules);
+        setTotalSchedules(prev => Math.max(prev - 1, 0));
         setMessage('Appointment deleted successfully');
       } else {
         setMessage('Failed to delete appointment');
@@ -147,7 +162,20 @@ const AdminPage = () => {
       <div style={{ background: 'white', padding: '20px', borderRadius: '12px', boxShadow: '0 8px 16px rgba(0,0,0,0.05)', marginBottom: '30px' }}>
         <h2 style={{ fontSize: '20px', marginBottom: '12px', display: 'flex', alignItems: 'center', gap: '8px' }}>
           <Calendar size={20} /> Scheduled Appointments
+          <span style={{ fontSize: '14px', color: '#6b7280', fontWeight: 'normal' }}>({totalSchedules})</span>
         </h2>
+        <select
+          value={statusFilter}
+          onChange={(e) => setStatusFilter(e.target.value)}
+          style={{ padding: '6px 10px', borderRadius: '4px', border: '1px solid #ddd', marginBottom: '12px' }}
+        >
+          <option value="">All statuses</option>
+          {statusOptions.map(option => (
+            <option key={option.value} value={option.value}>
+              {option.label}
+            </option>
+          ))}
+        </select>
         {schedules.length === 0 ? (
           <p>No appointments scheduled yet.</p>
         ) : (
@@ -288,6 +316,22 @@ const AdminPage = () => {
                 ))}
               </tbody>
             </table>
+            {nextCursor && (
+              <button
+                onClick={() => fetchSchedules(nextCursor)}
+                style={{
+                  marginTop: '12px',
+                  padding: '8px 16px',
+                  backgroundColor: '#6366f1',
+                  color: 'white',
+                  border: 'none',
+                  borderRadius: '4px',
+                  cursor: 'pointer'
+                }}
+              >
+                Load more
+              </button>
+            )}
           </div>
         )}
       </div>